@@ -0,0 +1,415 @@
+"""
+Agregados precalculados de la sabana: el dashboard lee de aquí y no de las filas.
+"""
+
+import numpy as np
+import pandas as pd
+
+CUBE_DIMENSIONS = ['Ciudad', 'Agrupación', 'MacroProyecto', 'Medio Publicitario', 'Mes']
+FILTER_DIMENSIONS = ['Ciudad', 'Agrupación', 'MacroProyecto', 'Medio Publicitario']
+
+# El filtro de fechas llega como {'Día': (desde, hasta)}, ambos inclusive
+DATE_DIMENSION = 'Día'
+
+# Granularidades de la evolución en el tiempo; cada periodo se identifica por su fecha de inicio
+TIME_GRANULARITIES = ['Día', 'Semana', 'Mes', 'Trimestre']
+
+# El cubo llega hasta el mes: con días tendría casi tantas celdas como filas.
+# Día y semana salen de las filas de la sabana (o de las celdas diarias si no se conservan)
+CUBE_PERIOD = 'Mes'
+DAY_GRANULARITIES = ['Día', 'Semana']
+
+
+def period_start(days, granularity):
+    """Inicio del periodo (semana desde el lunes, mes o trimestre) de cada fecha; conserva el año."""
+    if granularity == 'Día':
+        return days
+    if granularity == 'Semana':
+        return days - pd.to_timedelta(days.dt.dayofweek, unit='D')
+    if granularity == 'Mes':
+        # Truncar en numpy es mucho más rápido que pasar por Period en millones de filas
+        months = days.to_numpy(dtype='datetime64[ns]').astype('datetime64[M]').astype('datetime64[ns]')
+        return pd.Series(months, index=days.index, name=days.name)
+    return days.dt.to_period('Q').dt.start_time
+
+
+def add_time_rollups(cube):
+    """Agrega al cubo la llave de trimestre, que sale de la de mes."""
+    if CUBE_PERIOD in cube.columns:
+        cube['Trimestre'] = period_start(cube[CUBE_PERIOD], 'Trimestre')
+    return cube
+
+
+# Llaves posibles de una celda: las del cubo mensual y las de las celdas diarias
+_CELL_KEYS = CUBE_DIMENSIONS + [DATE_DIMENSION]
+
+
+def _cube_cells(df, dims, first=None):
+    """Suma y conteo de 'Valor Neto' por combinación de `dims`.
+
+    `df` son filas de la sabana ('Mes' se deriva de 'Día') o celdas ya
+    agregadas, con 'Unidades' y 'Primera'. `first` es la posición en la
+    sabana de cada fila de `df` si no son todas desde la primera.
+    """
+    cells = 'Unidades' in df.columns
+    work = {}
+    for dim in dims:
+        if dim in df.columns:
+            work[dim] = df[dim]
+        elif dim == CUBE_PERIOD and DATE_DIMENSION in df.columns:
+            work[dim] = period_start(df[DATE_DIMENSION], CUBE_PERIOD)
+    keys = list(work)
+    work['Valor Neto'] = df['Valor Neto']
+    if cells:
+        work['Unidades'] = df['Unidades']
+        work['Primera'] = df['Primera']
+    else:
+        work['Primera'] = np.arange(len(df)) if first is None else np.asarray(first)
+    return pd.DataFrame(work).groupby(keys, observed=True, dropna=False, sort=False).agg(**{
+        'Valor Neto': ('Valor Neto', 'sum'),
+        'Unidades': ('Unidades', 'sum') if cells else ('Valor Neto', 'size'),
+        'Primera': ('Primera', 'min'),
+    }).reset_index()
+
+
+def build_cube(df, first=None):
+    """Suma y conteo de 'Valor Neto' por dimensión y mes.
+
+    'Primera' es la posición de la primera fila de la celda; permite saber,
+    después de filtrar, qué valor aparecía primero en la sabana. `df` pueden
+    ser filas o celdas diarias (ver `CubeBuilder`).
+    """
+    return add_time_rollups(_cube_cells(df, CUBE_DIMENSIONS, first))
+
+
+def combine_cubes(parts):
+    """Une cubos parciales (con 'Primera' ya desplazada) en uno solo, sin llaves derivadas."""
+    parts = pd.concat(parts, ignore_index=True)
+    dims = [c for c in _CELL_KEYS if c in parts.columns]
+    return parts.groupby(dims, observed=True, dropna=False, sort=False).agg(**{
+        'Valor Neto': ('Valor Neto', 'sum'),
+        'Unidades': ('Unidades', 'sum'),
+        'Primera': ('Primera', 'min'),
+    }).reset_index()
+
+
+def finish_cube(cube):
+    """Tipos y llaves derivadas de `build_cube` para un cubo armado con `combine_cubes`."""
+    for col in FILTER_DIMENSIONS:
+        if col in cube.columns:
+            cube[col] = cube[col].astype('category')
+    return add_time_rollups(cube)
+
+
+def merge_cells(cells, delta):
+    """`cells` con las celdas de `delta` sumadas por llave; las llaves nuevas quedan al final.
+
+    Cuesta lo que `delta` más una copia de `cells`: el cubo existente no se
+    vuelve a agrupar. Ambos deben tener las mismas llaves, sin repetidas.
+    """
+    dims = [c for c in _CELL_KEYS if c in cells.columns]
+    found = pd.MultiIndex.from_frame(cells[dims]).get_indexer(pd.MultiIndex.from_frame(delta[dims]))
+    hit = found >= 0
+    merged = cells.copy()
+    if hit.any():
+        at, matched = found[hit], delta[hit]
+        for col in ('Valor Neto', 'Unidades'):
+            values = merged[col].to_numpy(copy=True)
+            values[at] += matched[col].to_numpy()
+            merged[col] = values
+        first = merged['Primera'].to_numpy(copy=True)
+        first[at] = np.minimum(first[at], matched['Primera'].to_numpy())
+        merged['Primera'] = first
+    if hit.all():
+        return merged
+    merged = pd.concat([merged, delta[~hit]], ignore_index=True)
+    for col in FILTER_DIMENSIONS:
+        # Categorías distintas se vuelven object al concatenar
+        if col in merged.columns and not isinstance(merged[col].dtype, pd.CategoricalDtype):
+            merged[col] = merged[col].astype('category')
+    return merged
+
+
+def append_to_cube(cube, rows, offset):
+    """Cubo con `rows` agregadas; `offset` es la posición de la primera en la sabana.
+
+    Solo las filas nuevas se agrupan; sus celdas se suman por llave a las del cubo.
+    """
+    return merge_cells(cube, build_cube(rows, first=np.arange(offset, offset + len(rows))))
+
+
+def append_to_day_cells(cells, rows, offset):
+    """Como `append_to_cube`, para las celdas diarias."""
+    first = np.arange(offset, offset + len(rows))
+    return merge_cells(cells, _cube_cells(rows, FILTER_DIMENSIONS + [DATE_DIMENSION], first))
+
+
+class CubeBuilder:
+    """Construye el cubo bloque a bloque, para ingestas que no caben en memoria.
+
+    Cada bloque se agrega apenas llega y las filas se descartan; la memoria
+    depende del número de combinaciones de dimensiones, no del de filas.
+    Con `days` además se arman las celdas diarias, que reemplazan a las
+    filas para el filtro de fechas y la evolución por día y semana.
+    """
+
+    def __init__(self, compact_every=16, days=False):
+        self.compact_every = compact_every
+        self.days = days
+        self.n_rows = 0
+        self.columns = None
+        self._parts = []
+        self._day_parts = []
+
+    def add(self, chunk):
+        first = np.arange(self.n_rows, self.n_rows + len(chunk))
+        self._parts.append(_cube_cells(chunk, CUBE_DIMENSIONS, first))
+        if self.days and DATE_DIMENSION in chunk.columns:
+            self._day_parts.append(_cube_cells(chunk, FILTER_DIMENSIONS + [DATE_DIMENSION], first))
+        self.n_rows += len(chunk)
+        if self.columns is None:
+            self.columns = list(chunk.columns)
+        if len(self._parts) >= self.compact_every:
+            self._parts = [combine_cubes(self._parts)]
+            if self._day_parts:
+                self._day_parts = [combine_cubes(self._day_parts)]
+
+    def result(self):
+        """El cubo con los mismos tipos que `build_cube` sobre la sabana completa."""
+        if not self._parts:
+            raise ValueError("La sabana no tiene filas")
+        return finish_cube(combine_cubes(self._parts))
+
+    def day_result(self):
+        """Las celdas diarias de lo leído; None sin `days` o si la sabana no trae fechas."""
+        if not self._day_parts:
+            return None
+        return finish_cube(combine_cubes(self._day_parts))
+
+
+class RowIndex:
+    """Índice invertido: para cada valor de una dimensión, las posiciones de sus filas.
+
+    Las posiciones de cada valor quedan ordenadas, así que un filtro se
+    resuelve uniendo las listas de los valores elegidos e intersectando
+    entre dimensiones, sin comparar columnas completas. Las filas que se
+    agregan después (`extended`) forman otra parte del índice.
+    """
+
+    def __init__(self, df, dims, offset=0):
+        self.dims = dims
+        self.n_rows = offset + len(df)
+        self._parts = [self._postings(df, dims, offset)]
+
+    @staticmethod
+    def _postings(df, dims, offset):
+        postings = {}
+        for dim in dims:
+            if dim not in df.columns:
+                continue
+            if isinstance(df[dim].dtype, pd.CategoricalDtype):
+                codes = df[dim].cat.codes.to_numpy()
+                labels = df[dim].cat.categories
+            else:
+                codes, labels = pd.factorize(df[dim])
+            order = np.argsort(codes, kind='stable')
+            bounds = np.searchsorted(codes[order], np.arange(len(labels) + 1))
+            order = _compact_positions(order + offset)
+            postings[dim] = {
+                label: order[bounds[i]:bounds[i + 1]] for i, label in enumerate(labels)
+            }
+        return postings
+
+    def extended(self, df, offset):
+        """Nuevo índice con las filas de `df`, desde la posición `offset`; comparte las partes de este."""
+        index = RowIndex.__new__(RowIndex)
+        index.dims = self.dims
+        index.n_rows = offset + len(df)
+        index._parts = self._parts + [self._postings(df, self.dims, offset)]
+        return index
+
+    def select(self, filters):
+        """Posiciones que cumplen `filters` ({dimensión: valores}); None si no hay filtro."""
+        matches = []
+        for dim, values in filters.items():
+            if not values or dim not in self._parts[0]:
+                continue
+            matched = np.concatenate([
+                part[dim].get(v, _NO_ROWS) for v in values for part in self._parts if dim in part
+            ])
+            matched.sort()
+            matches.append(matched)
+        if not matches:
+            return None
+        matches.sort(key=len)
+        positions = matches[0]
+        for matched in matches[1:]:
+            positions = np.intersect1d(positions, matched, assume_unique=True)
+        return positions
+
+    def apply(self, df, filters):
+        positions = self.select(filters)
+        return df if positions is None else df.iloc[positions]
+
+
+_NO_ROWS = np.empty(0, dtype=np.intp)
+
+
+def _compact_positions(positions):
+    # Posiciones en int32 mientras quepan: los índices sobre filas pesan la mitad
+    return positions.astype(np.int32) if positions.max(initial=0) < 2**31 else positions
+
+
+def day_number(value):
+    """Días desde 1970-01-01 de una fecha (se ignora la hora)."""
+    return int(pd.Timestamp(value).to_datetime64().astype('datetime64[D]').astype(np.int64))
+
+
+class TimeIndex:
+    """Las posiciones de una tabla ordenadas por 'Día': un rango de fechas es un tramo contiguo.
+
+    Sirve para las filas de la sabana y para las celdas diarias, en el orden
+    en que estén. Guarda el orden (int32) y el número de día de cada posición
+    (int32); las posiciones sin fecha no entran y ningún rango las incluye.
+    Las filas que se agregan después (`extended`) forman otra parte.
+    """
+
+    def __init__(self, days, offset=0):
+        self._parts = [self._sorted(days, offset)]
+
+    @staticmethod
+    def _sorted(days, offset):
+        days = np.asarray(days, dtype='datetime64[ns]').astype('datetime64[D]')
+        order = np.flatnonzero(~np.isnat(days))
+        order = order[np.argsort(days[order], kind='stable')]
+        return _compact_positions(order + offset), days[order].astype(np.int64).astype(np.int32)
+
+    def extended(self, days, offset):
+        """Nuevo índice con las fechas `days`, desde la posición `offset`; comparte las partes de este."""
+        index = TimeIndex.__new__(TimeIndex)
+        index._parts = self._parts + [self._sorted(days, offset)]
+        return index
+
+    @property
+    def bounds(self):
+        """Primera y última fecha (Timestamp); None si ninguna posición trae fecha."""
+        days = [d for _, d in self._parts if len(d)]
+        if not days:
+            return None
+        first, last = min(d[0] for d in days), max(d[-1] for d in days)
+        return tuple(pd.Timestamp(np.datetime64(int(d), 'D')) for d in (first, last))
+
+    def select(self, start, end, positions=None):
+        """Posiciones (ordenadas) con fecha entre `start` y `end`, dentro de `positions` (ordenadas) si se dan."""
+        start, end = day_number(start), day_number(end)
+        in_range = np.sort(np.concatenate([
+            order[np.searchsorted(days, start, side='left'):np.searchsorted(days, end, side='right')]
+            for order, days in self._parts
+        ]))
+        if positions is None:
+            return in_range
+        return np.intersect1d(positions, in_range, assume_unique=True)
+
+
+def split_months(start, end):
+    """Parte el rango de días [start, end] en meses completos y tramos sueltos.
+
+    Devuelve ((desde, hasta), tramos): los meses con inicio en [desde, hasta)
+    están enteros dentro del rango (None si no hay ninguno) y cada tramo
+    (inicio, fin) son los días, inclusive, de un mes cortado por el rango.
+    """
+    start, end = pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize()
+    after = end + pd.Timedelta(days=1)
+    first = start if start.day == 1 else (start.to_period('M') + 1).start_time
+    last = after if after.day == 1 else end.to_period('M').start_time
+    if first >= last:
+        return None, [(start, end)] if start <= end else []
+    edges = []
+    if start < first:
+        edges.append((start, first - pd.Timedelta(days=1)))
+    if last <= end:
+        edges.append((last, end))
+    return (first, last), edges
+
+
+def daily_totals(days, ventas, unidades=None):
+    """Ventas y unidades por 'Día' (columnas alineadas, en orden cronológico); sin fechas vacías.
+
+    Sin `unidades`, cada posición cuenta como una unidad.
+    """
+    data = pd.DataFrame({
+        DATE_DIMENSION: np.asarray(days, dtype='datetime64[ns]'),
+        'Valor Neto': np.asarray(ventas, dtype='float64'),
+        'Unidades': np.ones(len(ventas), dtype=np.int64) if unidades is None else np.asarray(unidades),
+    })
+    return data.groupby(DATE_DIMENSION, sort=True)[['Valor Neto', 'Unidades']].sum().reset_index()
+
+
+def add_shares(data):
+    """Ticket y participación (%) sobre un agregado con 'Valor Neto' y 'Unidades'."""
+    data['Ticket'] = data['Valor Neto'] / data['Unidades']
+    data['PctVentas'] = (data['Valor Neto'] / data['Valor Neto'].sum() * 100).round(1)
+    data['PctUds'] = (data['Unidades'] / data['Unidades'].sum() * 100).round(1)
+    return data
+
+
+def filter_key(filters):
+    """Clave estable (hashable) de un estado de filtros."""
+    return tuple(sorted((dim, tuple(sorted(values))) for dim, values in filters.items() if values))
+
+
+class DashboardStats:
+    """Ventas, unidades, ticket y participación de un estado de filtros.
+
+    Cada dimensión se agrega una sola vez sobre el cubo filtrado y el
+    resultado se reutiliza en KPIs, pestañas e insights. Los DataFrames
+    devueltos se comparten: no se deben mutar. `key` identifica el
+    (dataset, estado de filtros) y sirve de clave para cachés derivadas.
+
+    El cubo llega hasta el mes. `days`, si se da, es una función que
+    devuelve ventas y unidades por 'Día' del mismo estado de filtros; solo
+    se llama para la evolución por día o por semana.
+    """
+
+    def __init__(self, cube, key=None, days=None):
+        self.cube = cube
+        self.key = key
+        self._days = days
+        self.total_ventas = cube['Valor Neto'].sum()
+        self.total_unidades = int(cube['Unidades'].sum())
+        self.ticket = self.total_ventas / self.total_unidades if self.total_unidades > 0 else 0
+        self._by = {}
+
+    @property
+    def empty(self):
+        return self.cube.empty
+
+    def has(self, dim):
+        if dim in DAY_GRANULARITIES:
+            return CUBE_PERIOD in self.cube.columns and self._days is not None
+        return dim in self.cube.columns
+
+    def timeline(self, granularity):
+        """Ventas y unidades por periodo, en orden cronológico y con el año (sin filas sin fecha)."""
+        return self.by(granularity)
+
+    def by(self, dim):
+        if dim not in self._by:
+            if dim in DAY_GRANULARITIES:
+                daily = self._days()
+                data = daily.groupby(period_start(daily[DATE_DIMENSION], dim).rename(dim))
+            else:
+                data = self.cube.groupby(dim, observed=True)
+            self._by[dim] = add_shares(data[['Valor Neto', 'Unidades']].sum()).reset_index()
+        return self._by[dim]
+
+    def nunique(self, dim):
+        return len(self.by(dim))
+
+    def projects(self):
+        """Agregado por MacroProyecto con la ciudad de su primera fila en la sabana."""
+        if 'projects' not in self._by:
+            first_city = self.cube.sort_values('Primera').groupby('MacroProyecto', observed=True)['Ciudad'].first()
+            data = self.by('MacroProyecto').join(first_city, on='MacroProyecto')
+            self._by['projects'] = data.sort_values('Valor Neto', ascending=False)
+        return self._by['projects']
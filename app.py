@@ -3,12 +3,19 @@ CONALTURA - DASHBOARD EJECUTIVO 2025
 Gran Convención de Ventas
 """
 
+import io
+import os
+import time
+import uuid
+from contextlib import nullcontext
+
 import streamlit as st
-import pandas as pd
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 from pathlib import Path
 
+from cache import LRUCache
+from registry import DatasetRegistry
+from theme import CORAL, LIME, TEAL
+
 # ══════════════════════════════════════════════════════════════════════════════
 # CONFIGURACIÓN
 # ══════════════════════════════════════════════════════════════════════════════
@@ -20,131 +27,240 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# ══════════════════════════════════════════════════════════════════════════════
-# COLORES
-# ══════════════════════════════════════════════════════════════════════════════
+# Sabanas ya procesadas que se conservan en memoria (compartidas por todas las sesiones;
+# las que alguna sesión está viendo no se expulsan)
+DATA_CACHE_MAX_ENTRIES = 8
+DATA_CACHE_MAX_BYTES = 2 * 1024**3
 
-TEAL = '#125160'
-LIME = '#DBFF69'
-CORAL = '#FF795A'
-LILAC = '#B382FF'
-CYAN = '#00D4AA'
-GOLD = '#FFB800'
+# Agregados por estado de filtros que se conservan (por dataset y combinación de filtros)
+STATS_CACHE_MAX_ENTRIES = 256
 
-AGRUPACION_COLORS = {
-    'Ventas Digitales': '#00D4AA',
-    'Ventas Tradicionales': '#125160',
-    'Ventas Referidos': '#B382FF',
-    'Ventas Ferias': '#FF795A',
-    'Ventas Recompra': '#FFB800',
-    'Ventas Colaboradores': '#4A90D9',
-    'Ventas Aliados': '#FF6B9D',
-    'Ventas Canjes': '#DBFF69',
-    'Ventas Empresas': '#8B5CF6',
-    'Eventos Internacionales': '#EC4899',
-}
+# Figuras ya construidas por (dataset, filtros, figura)
+FIGURE_CACHE_MAX_ENTRIES = 1024
+FIGURE_CACHE_MAX_BYTES = 256 * 1024**2
 
-CIUDAD_COLORS = {
-    'Medellín': '#125160',
-    'Barranquilla': '#FF795A',
-    'Bogotá': '#B382FF',
-    'Cali': '#00D4AA',
-    'Cartagena': '#FFB800',
-}
+# CSV desde este tamaño se ingieren por bloques: solo se conserva el cubo de agregados
+STREAM_CSV_MIN_BYTES = 100 * 1024**2
+
+# CSV desde este tamaño se ingieren en segundo plano y el dashboard muestra lo leído hasta el momento
+BACKGROUND_INGEST_MIN_BYTES = int(os.environ.get('CONALTURA_BACKGROUND_MIN_BYTES', 20 * 1024**2))
+
+# Cada cuánto se redibuja la vista parcial mientras avanza la ingesta
+INGEST_REFRESH_SECONDS = 1.0
+
+# Vista previa: mientras corre la ingesta en segundo plano, estimaciones con una muestra aleatoria
+# de filas (con su margen del 95 %) en vez de solo lo leído hasta el momento
+PREVIEW = os.environ.get('CONALTURA_PREVIEW') == '1'
+
+# Archivos desde este tamaño se cargan en el motor SQL embebido (DuckDB o SQLite)
+SQL_BACKEND_MIN_BYTES = int(os.environ.get('CONALTURA_SQL_MIN_BYTES', 500 * 1024**2))
+
+# Carpeta vigilada con las exportaciones del CRM: cada archivo nuevo o modificado agrega solo sus filas nuevas.
+# CONALTURA_DROP_KEY es la columna que identifica una venta, si la exportación la trae
+DROP_DIR = os.environ.get('CONALTURA_DROP_DIR')
+DROP_KEY = os.environ.get('CONALTURA_DROP_KEY') or None
+DROP_POLL_SECONDS = float(os.environ.get('CONALTURA_DROP_POLL_SECONDS', 30))
+DROP_FOLDER_ID = 'carpeta'
+
+# Hoja de estilos de la página, que se inserta en línea
+STATIC_DIR = Path(__file__).parent / 'static'
+
+# Snapshots columnares de las sabanas ya ingeridas (sobreviven a reinicios)
+SNAPSHOT_DIR = Path(os.environ.get('CONALTURA_SNAPSHOT_DIR', Path(__file__).parent / '.snapshots'))
+
+# Instrumentación por etapa: CONALTURA_PROFILE=1 para todas las sesiones o ?perfil=1 en la URL
+PROFILE_LOG = Path(os.environ.get('CONALTURA_PROFILE_LOG', Path(__file__).parent / 'perfil.jsonl'))
+profiling = os.environ.get('CONALTURA_PROFILE') == '1' or st.query_params.get('perfil') == '1'
 
 # ══════════════════════════════════════════════════════════════════════════════
 # CSS
 # ══════════════════════════════════════════════════════════════════════════════
 
-st.markdown("""
-<style>
-    @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700;800&display=swap');
-    * { font-family: 'Inter', sans-serif !important; }
-    .stApp { background: #F8FAFC !important; }
-    .main .block-container { padding: 1rem 2rem !important; max-width: 1600px; }
-    #MainMenu, footer, header, .stDeployButton { display: none !important; }
-    div[data-testid="stMetric"] {
-        background: white;
-        padding: 1.2rem;
-        border-radius: 16px;
-        border: 1px solid #E2E8F0;
-        box-shadow: 0 4px 20px rgba(18, 81, 96, 0.08);
-    }
-    div[data-testid="stMetric"] label {
-        color: #64748B !important;
-        font-size: 0.75rem !important;
-        font-weight: 600 !important;
-        text-transform: uppercase !important;
-    }
-    div[data-testid="stMetric"] [data-testid="stMetricValue"] {
-        color: #125160 !important;
-        font-size: 1.7rem !important;
-        font-weight: 800 !important;
-    }
-    .stTabs [data-baseweb="tab-list"] { gap: 8px; background: white; padding: 8px; border-radius: 12px; }
-    .stTabs [aria-selected="true"] { background: #125160 !important; color: #DBFF69 !important; }
-</style>
-""", unsafe_allow_html=True)
+@st.cache_resource
+def page_css():
+    # Se lee una vez por proceso; sin @import ni recursos externos
+    return (STATIC_DIR / 'app.css').read_text(encoding='utf-8')
+
+st.markdown(f"<style>{page_css()}</style>", unsafe_allow_html=True)
 
 # ══════════════════════════════════════════════════════════════════════════════
 # FUNCIONES
 # ══════════════════════════════════════════════════════════════════════════════
 
-def format_cop(value):
-    if pd.isna(value) or value == 0:
-        return "$0"
-    return f"${value:,.0f}".replace(",", ".")
-
-def format_short(value):
-    if pd.isna(value) or value == 0:
-        return "$0"
-    abs_val = abs(value)
-    if abs_val >= 1_000_000_000_000:
-        return f"${value/1_000_000_000_000:.2f}B"
-    elif abs_val >= 1_000_000_000:
-        return f"${value/1_000_000_000:.1f}MM"
-    elif abs_val >= 1_000_000:
-        return f"${value/1_000_000:.0f}M"
-    elif abs_val >= 1_000:
-        return f"${value/1_000:.0f}K"
-    return f"${value:.0f}"
-
-def format_num(value):
-    if pd.isna(value) or value == 0:
-        return "0"
-    return f"{int(value):,}".replace(",", ".")
-
-def get_color(name, color_dict):
-    return color_dict.get(name, '#64748B')
-
-def load_data(uploaded_file):
-    try:
-        if uploaded_file.name.endswith('.csv'):
-            content = uploaded_file.read().decode('utf-8')
-            uploaded_file.seek(0)
-            sep = ';' if ';' in content[:1000] else ','
-            df = pd.read_csv(uploaded_file, sep=sep)
+def get_profiler():
+    from profiler import Profiler
+
+    if 'profiler' not in st.session_state:
+        st.session_state['profiler'] = Profiler(session=uuid.uuid4().hex[:8], log_path=PROFILE_LOG)
+    return st.session_state['profiler']
+
+def stage(name):
+    """Mide una etapa del rerun si la instrumentación está activa."""
+    return get_profiler().stage(name) if profiling else nullcontext()
+
+if profiling:
+    get_profiler().begin()
+
+@st.cache_resource
+def get_registry():
+    return DatasetRegistry(DATA_CACHE_MAX_ENTRIES, DATA_CACHE_MAX_BYTES)
+
+def build_dataset(content, filename, digest, sheets=None):
+    if len(content) >= SQL_BACKEND_MIN_BYTES:
+        if filename.endswith('.csv'):
+            chunks = iter_csv_chunks(io.BytesIO(content))
         else:
-            df = pd.read_excel(uploaded_file)
-        
-        df.columns = df.columns.str.strip()
-        
-        if 'Fecha' in df.columns:
-            df['Fecha'] = pd.to_datetime(df['Fecha'], errors='coerce')
-            df['Mes'] = df['Fecha'].dt.month
-        
-        if 'Valor Neto' in df.columns:
-            df['Valor Neto'] = pd.to_numeric(df['Valor Neto'], errors='coerce').fillna(0)
-        
-        for col in ['MacroProyecto', 'Medio Publicitario', 'Ciudad', 'Agrupación']:
-            if col in df.columns:
-                df[col] = df[col].fillna('Sin Definir').astype(str).str.strip()
-        
-        return df
+            chunks = [load_sabana(content, filename, digest=digest, snapshot_dir=SNAPSHOT_DIR, sheets=sheets)]
+        return SQLDataset.from_chunks(selection_hash(digest, sheets), chunks)
+    if filename.endswith('.csv') and len(content) >= STREAM_CSV_MIN_BYTES:
+        return Dataset.from_chunks(digest, iter_csv_chunks(io.BytesIO(content)))
+    df = load_sabana(content, filename, digest=digest, snapshot_dir=SNAPSHOT_DIR, sheets=sheets)
+    return Dataset.from_frame(selection_hash(digest, sheets), df)
+
+@st.cache_resource
+def clean_snapshots():
+    # Una vez por proceso: borra los snapshots de versiones anteriores del esquema, los viejos y los que pasan del tope
+    from ingest import prune_snapshots
+
+    return prune_snapshots(SNAPSHOT_DIR)
+
+def runs_in_background(content, filename, digest):
+    # Con snapshot en disco la carga directa ya es inmediata
+    return (
+        filename.endswith('.csv')
+        and BACKGROUND_INGEST_MIN_BYTES <= len(content) < SQL_BACKEND_MIN_BYTES
+        and not snapshot_path(SNAPSHOT_DIR, digest).exists()
+    )
+
+def start_ingest(content, digest):
+    # Bajo STREAM_CSV_MIN_BYTES se conserva la sabana completa, como en la carga directa
+    preview = None
+    if PREVIEW:
+        preview = lambda: SampleDataset(f"{digest}~muestra", *sample_csv(content, PREVIEW_SAMPLE_ROWS))
+    return IngestJob(
+        digest,
+        iter_csv_chunks(io.BytesIO(content)),
+        total_rows=content.count(b'\n'),
+        keep_frame=len(content) < STREAM_CSV_MIN_BYTES,
+        snapshot_dir=SNAPSHOT_DIR,
+        preview=preview,
+    )
+
+def file_digest(uploaded_file):
+    """Hash del archivo subido; se calcula una vez por archivo en la sesión, no en cada rerun."""
+    from ingest import content_hash
+
+    cached = st.session_state.get('file_digest')
+    if cached is None or cached[0] != uploaded_file.file_id:
+        cached = (uploaded_file.file_id, content_hash(uploaded_file.getvalue()))
+        st.session_state['file_digest'] = cached
+    return cached[1]
+
+def load_data(uploaded_file, digest, sheets=None):
+    """El Dataset de la sabana o, si es un CSV grande, el IngestJob que la está leyendo."""
+    content = uploaded_file.getvalue()
+    try:
+        if runs_in_background(content, uploaded_file.name, digest):
+            # Una ingesta fallida se reintenta al subir el archivo otra vez, no en cada rerun de la sesión
+            retry = st.session_state.get('ingest_file') != uploaded_file.file_id
+            st.session_state['ingest_file'] = uploaded_file.file_id
+            return get_registry().get_or_start(
+                digest, uploaded_file.name, lambda: start_ingest(content, digest), retry=retry,
+            )
+        return get_registry().get_or_load(
+            selection_hash(digest, sheets),
+            uploaded_file.name,
+            lambda: build_dataset(content, uploaded_file.name, digest, sheets),
+        )
     except Exception as e:
         st.error(f"Error: {str(e)}")
         return None
 
+@st.cache_resource
+def get_drop_folder():
+    """La carpeta vigilada (None si no se configuró); cada versión se registra para compartirla."""
+    if not DROP_DIR:
+        return None
+    from dropfolder import DropFolder
+
+    # Solo la última versión ocupa lugar en el registro, siempre con el mismo id
+    registry = get_registry()
+    name = f"📂 {Path(DROP_DIR).name}"
+    folder = DropFolder(DROP_DIR, key=DROP_KEY, on_update=lambda ds: registry.replace(DROP_FOLDER_ID, name, ds))
+    return folder.start(DROP_POLL_SECONDS)
+
+def select_shared_dataset():
+    """Datasets que ya cargó alguna sesión; elegir uno evita subir el archivo otra vez."""
+    entries = [e for e in get_registry().entries() if e['id'] != DROP_FOLDER_ID]
+    folder = get_drop_folder()
+    if not entries and (folder is None or folder.dataset is None):
+        return None
+    from formatting import format_num
+
+    labels = {}
+    if folder is not None and folder.dataset is not None:
+        labels[DROP_FOLDER_ID] = f"📂 Carpeta vigilada (siempre al día) · {format_num(folder.dataset.n_rows)} filas"
+    labels.update({
+        e['id']: f"{e['name']} · v{e['version']} · {format_num(e['rows'])} filas · 👥 {e['sessions']}"
+        for e in entries
+    })
+    choice = st.selectbox(
+        "🗂️ O ELIGE UNO YA CARGADO", list(labels), index=None, format_func=labels.get, placeholder="Ninguno"
+    )
+    if choice == DROP_FOLDER_ID:
+        for name, error in list(folder.errors.items()):
+            st.caption(f"⚠️ {name}: {error}")
+    return choice
+
+def hold_dataset(dataset_id):
+    # La sesión mantiene su dataset en el registro mientras lo está viendo
+    lease = st.session_state.get('dataset_lease')
+    if lease is None or lease.dataset_id != dataset_id:
+        st.session_state['dataset_lease'] = get_registry().lease(dataset_id)
+
+def refresh_while_loading(job):
+    """Vuelve a correr la página en un momento si la ingesta sigue en curso."""
+    if job is not None:
+        time.sleep(INGEST_REFRESH_SECONDS)
+        st.rerun()
+
+@st.cache_resource
+def get_sheet_cache():
+    return LRUCache(DATA_CACHE_MAX_ENTRIES)
+
+def select_sheets(uploaded_file, digest):
+    """Hojas a unir de un Excel; por defecto, las que traen las columnas obligatorias."""
+    from ingest import excel_sheets
+
+    content = uploaded_file.getvalue()
+    try:
+        hojas = get_sheet_cache().get_or_compute(digest, lambda: excel_sheets(content))
+    except Exception:
+        return None  # la carga mostrará el error
+    if len(hojas) <= 1:
+        return None
+    default = [h for h, completa in hojas.items() if completa] or list(hojas)[:1]
+    return st.multiselect("📑 Hojas", list(hojas), default=default, placeholder="Elige al menos una hoja")
+
+@st.cache_resource
+def get_stats_cache():
+    return LRUCache(STATS_CACHE_MAX_ENTRIES)
+
+@st.cache_resource
+def get_figure_cache():
+    # Cada entrada guarda la figura con el tamaño de su spec: se serializa una sola vez
+    return LRUCache(FIGURE_CACHE_MAX_ENTRIES, FIGURE_CACHE_MAX_BYTES, sizeof=lambda entry: entry[1])
+
+def show_figure(fig_id, stats):
+    def build():
+        fig = build_figure(fig_id, stats)
+        return fig, figure_nbytes(fig)
+
+    fig, nbytes = get_figure_cache().get_or_compute((stats.key, fig_id), build)
+    if profiling:
+        get_profiler().payload(fig_id, nbytes)
+    st.plotly_chart(fig, width='stretch')
+
 # ══════════════════════════════════════════════════════════════════════════════
 # SIDEBAR
 # ══════════════════════════════════════════════════════════════════════════════
@@ -161,8 +277,14 @@ with st.sidebar:
     
     uploaded_file = st.file_uploader("📁 CARGAR DATOS", type=['csv', 'xlsx', 'xls'])
     
-    filter_ciudad = 'Todas'
-    filter_agrupacion = 'Todas'
+    sheets = None
+    shared_id = None
+    if uploaded_file is None:
+        shared_id = select_shared_dataset()
+    elif not uploaded_file.name.endswith('.csv'):
+        sheets = select_sheets(uploaded_file, file_digest(uploaded_file))
+    
+    filters = {}
 
 # ══════════════════════════════════════════════════════════════════════════════
 # HEADER
@@ -191,7 +313,8 @@ st.markdown("<div style='height:1rem'></div>", unsafe_allow_html=True)
 # SIN DATOS
 # ══════════════════════════════════════════════════════════════════════════════
 
-if uploaded_file is None:
+if uploaded_file is None and shared_id is None:
+    st.session_state.pop('dataset_lease', None)
     st.markdown(f"""
     <div style="text-align:center; padding:4rem 2rem; background:white; border-radius:20px; border:1px solid #E2E8F0; max-width:550px; margin:3rem auto;">
         <div style="font-size:4rem; margin-bottom:1.5rem;">📊</div>
@@ -201,18 +324,73 @@ if uploaded_file is None:
     """, unsafe_allow_html=True)
     st.stop()
 
+# ══════════════════════════════════════════════════════════════════════════════
+# MÓDULOS DE DATOS
+# ══════════════════════════════════════════════════════════════════════════════
+
+# Pandas, PyArrow y Plotly se importan recién aquí: la pantalla de bienvenida no los necesita
+from aggregates import DATE_DIMENSION, TIME_GRANULARITIES
+from background import IngestJob
+from cards import agrupacion_cards, insight_cards, project_cards
+from dataset import Dataset
+from export import EXPORT_CHUNK_ROWS, EXPORT_FORMATS, ExportFile, export_file, frame_chunks
+from figures import build_figure, figure_nbytes
+from formatting import format_cop, format_num, format_short
+from ingest import (
+    REQUIRED_COLUMNS, iter_csv_chunks, load_sabana, sample_csv, selection_hash, snapshot_path,
+)
+from preview import PREVIEW_SAMPLE_ROWS, SampleDataset, SampleStats
+from sqlengine import SQLDataset
+
 # ══════════════════════════════════════════════════════════════════════════════
 # CARGAR DATOS
 # ══════════════════════════════════════════════════════════════════════════════
 
-df = load_data(uploaded_file)
+clean_snapshots()
+
+if sheets == []:
+    st.warning("Selecciona al menos una hoja del libro")
+    st.stop()
+
+with stage('ingesta'):
+    if uploaded_file is not None:
+        dataset = load_data(uploaded_file, file_digest(uploaded_file), sheets)
+    elif shared_id == DROP_FOLDER_ID:
+        dataset = get_drop_folder().dataset
+    else:
+        dataset = get_registry().get(shared_id)
+
+ingest_job = None
+if isinstance(dataset, IngestJob):
+    ingest_job = dataset
+    if ingest_job.error is not None:
+        st.error(f"Error tras leer {format_num(ingest_job.rows_read)} filas: {ingest_job.error}")
+        st.stop()
+    dataset = ingest_job.partial()
+    if ingest_job.done:
+        ingest_job = None
+    else:
+        if isinstance(dataset, SampleDataset):
+            vista = f"Estimación con una muestra de {format_num(len(dataset.frame))} filas (margen del 95 %)."
+        else:
+            vista = "Vista parcial con lo leído hasta ahora."
+        st.progress(
+            ingest_job.progress,
+            text=f"⏳ Cargando la sabana: {format_num(ingest_job.rows_read)} filas ({ingest_job.progress:.0%}). {vista}",
+        )
+        if dataset is None:
+            refresh_while_loading(ingest_job)
 
-if df is None or df.empty:
+if dataset is None or dataset.n_rows == 0:
     st.error("No se pudieron cargar los datos")
     st.stop()
 
-required_cols = ['MacroProyecto', 'Valor Neto', 'Ciudad', 'Agrupación']
-missing = [c for c in required_cols if c not in df.columns]
+if shared_id == DROP_FOLDER_ID:
+    hold_dataset(DROP_FOLDER_ID)
+else:
+    hold_dataset(ingest_job.dataset_id if ingest_job is not None else dataset.id)
+
+missing = [c for c in REQUIRED_COLUMNS if c not in dataset.columns]
 if missing:
     st.error(f"Faltan columnas: {missing}")
     st.stop()
@@ -223,423 +401,291 @@ if missing:
 
 with st.sidebar:
     st.markdown("---")
-    ciudades = ['Todas'] + sorted(df['Ciudad'].unique().tolist())
-    filter_ciudad = st.selectbox("🏙️ Ciudad", ciudades)
+    filter_labels = {
+        'Ciudad': "🏙️ Ciudad",
+        'Agrupación': "📢 Agrupación",
+        'MacroProyecto': "🏗️ Proyecto",
+        'Medio Publicitario': "📣 Medio Publicitario",
+    }
+    for col, label in filter_labels.items():
+        if col in dataset.columns:
+            opciones = dataset.options(col)
+            key = f"filtro_{col}"
+            # Las vistas parciales cambian las opciones: se conserva lo elegido que siga existiendo
+            if key in st.session_state:
+                validas = set(opciones)
+                st.session_state[key] = [v for v in st.session_state[key] if v in validas]
+            filters[col] = st.multiselect(label, opciones, placeholder="Todas", key=key)
     
-    agrupaciones = ['Todas'] + sorted(df['Agrupación'].unique().tolist())
-    filter_agrupacion = st.selectbox("📢 Agrupación", agrupaciones)
+    date_range = dataset.date_range()
+    if date_range is not None:
+        desde, hasta = (d.date() for d in date_range)
+        rango = st.date_input("📅 Fechas", (desde, hasta), min_value=desde, max_value=hasta, format="DD/MM/YYYY")
+        # El rango completo no filtra: así se conservan las filas sin fecha
+        if len(rango) == 2 and tuple(rango) != (desde, hasta):
+            filters[DATE_DIMENSION] = tuple(rango)
     
     st.markdown("---")
     st.markdown(f"""
     <div style="background:{TEAL}; padding:1rem; border-radius:12px; text-align:center;">
         <p style="color:{LIME}; font-size:0.7rem; font-weight:700; margin:0;">REGISTROS</p>
-        <p style="color:white; font-size:1.5rem; font-weight:800; margin:0;">{format_num(len(df))}</p>
+        <p style="color:white; font-size:1.5rem; font-weight:800; margin:0;">{format_num(dataset.n_rows)}</p>
     </div>
     """, unsafe_allow_html=True)
+    
+    with st.expander("🧬 Esquema"):
+        report = dataset.schema()
+        st.dataframe(report, hide_index=True, width='stretch')
+        if isinstance(dataset, SQLDataset):
+            st.caption(
+                f"Motor SQL ({dataset.engine.driver}): {dataset.engine.nbytes / 1024**2:.1f} MB en disco, "
+                "los agregados se calculan en la base"
+            )
+        else:
+            st.caption(f"Memoria total: {report['Memoria (MB)'].sum():.1f} MB")
+            if not dataset.has_rows:
+                st.caption("Ingesta por bloques: solo se conserva el cubo de agregados")
+    
+    perf_panel = st.empty()
 
-df_f = df.copy()
-if filter_ciudad != 'Todas':
-    df_f = df_f[df_f['Ciudad'] == filter_ciudad]
-if filter_agrupacion != 'Todas':
-    df_f = df_f[df_f['Agrupación'] == filter_agrupacion]
+with stage('filtros'):
+    stats = get_stats_cache().get_or_compute(dataset.stats_key(filters), lambda: dataset.stats(filters))
 
-if df_f.empty:
+if stats.empty:
     st.warning("No hay datos para los filtros seleccionados")
+    refresh_while_loading(ingest_job)
     st.stop()
 
 # ══════════════════════════════════════════════════════════════════════════════
-# KPIs
+# EXPORTAR
 # ══════════════════════════════════════════════════════════════════════════════
 
-total_ventas = df_f['Valor Neto'].sum()
-total_unidades = len(df_f)
-ticket = total_ventas / total_unidades if total_unidades > 0 else 0
-n_proyectos = df_f['MacroProyecto'].nunique()
-n_agrupaciones = df_f['Agrupación'].nunique()
-n_ciudades = df_f['Ciudad'].nunique()
-
-k1, k2, k3, k4, k5, k6 = st.columns(6)
-with k1:
-    st.metric("💰 VENTA TOTAL", format_short(total_ventas), format_cop(total_ventas))
-with k2:
-    st.metric("🏠 UNIDADES", format_num(total_unidades), "Inmuebles")
-with k3:
-    st.metric("📈 TICKET", format_short(ticket), "Promedio")
-with k4:
-    st.metric("🏗️ PROYECTOS", n_proyectos, "Activos")
-with k5:
-    st.metric("📢 AGRUPACIONES", n_agrupaciones, "Canales")
-with k6:
-    st.metric("🌎 CIUDADES", n_ciudades, "Operación")
+EXPORT_TABLES = {
+    'filas': "Filas filtradas",
+    'ciudades': "Por ciudad",
+    'agrupaciones': "Por agrupación",
+    'proyectos': "Por proyecto",
+}
 
-st.markdown("<br>", unsafe_allow_html=True)
+# El archivo se arma solo al pedirlo y bloque a bloque; no en cada rerun
+@st.fragment
+def render_export(dataset, stats, filters):
+    tables = {
+        'filas': lambda: dataset.iter_rows(filters, EXPORT_CHUNK_ROWS),
+        'ciudades': lambda: frame_chunks(stats.by('Ciudad').sort_values('Valor Neto', ascending=False)),
+        'agrupaciones': lambda: frame_chunks(stats.by('Agrupación').sort_values('Valor Neto', ascending=False)),
+        'proyectos': lambda: frame_chunks(stats.projects()),
+    }
+    if not dataset.has_rows:
+        del tables['filas']  # ingesta por bloques: solo se conservó el cubo
+
+    with st.expander("⬇️ Exportar"):
+        tabla = st.selectbox("Tabla", list(tables), format_func=EXPORT_TABLES.get, key="export_tabla")
+        formato = st.segmented_control(
+            "Formato", list(EXPORT_FORMATS), default='csv', key="export_formato", format_func=str.upper
+        ) or 'csv'
+        key = (stats.key, tabla, formato)
+        if st.button("Preparar archivo", width='stretch'):
+            with st.spinner("Exportando…"):
+                st.session_state['export'] = ExportFile(export_file(tables[tabla](), formato), key)
+        ready = st.session_state.get('export')
+        if ready is not None and ready.key == key:
+            with open(ready.path, 'rb') as f:
+                st.download_button(
+                    "Descargar", f, file_name=f"conaltura-{tabla}.{formato}", mime=EXPORT_FORMATS[formato],
+                    on_click="ignore", width='stretch',
+                )
+
+if ingest_job is None:
+    with st.sidebar:
+        render_export(dataset, stats, filters)
 
 # ══════════════════════════════════════════════════════════════════════════════
-# TABS
+# KPIs
 # ══════════════════════════════════════════════════════════════════════════════
 
-tab1, tab2, tab3 = st.tabs(["📊 PANORAMA", "📢 AGRUPACIONES", "🏗️ PROYECTOS"])
+def render_kpis(stats):
+    total_ventas = stats.total_ventas
+    total_unidades = stats.total_unidades
+    ticket = stats.ticket
+    n_proyectos = stats.nunique('MacroProyecto')
+    n_agrupaciones = stats.nunique('Agrupación')
+    n_ciudades = stats.nunique('Ciudad')
+
+    delta_ventas, delta_unidades, delta_color = format_cop(total_ventas), "Inmuebles", "normal"
+    if isinstance(stats, SampleStats):
+        delta_color = "off"
+        delta_ventas = f"± {format_short(stats.margin_ventas)} (estimado)"
+        delta_unidades = f"± {format_num(stats.margin_unidades)} (estimado)"
+
+    k1, k2, k3, k4, k5, k6 = st.columns(6)
+    with k1:
+        st.metric("💰 VENTA TOTAL", format_short(total_ventas), delta_ventas, delta_color=delta_color)
+    with k2:
+        st.metric("🏠 UNIDADES", format_num(total_unidades), delta_unidades, delta_color=delta_color)
+    with k3:
+        st.metric("📈 TICKET", format_short(ticket), "Promedio")
+    with k4:
+        st.metric("🏗️ PROYECTOS", n_proyectos, "Activos")
+    with k5:
+        st.metric("📢 AGRUPACIONES", n_agrupaciones, "Canales")
+    with k6:
+        st.metric("🌎 CIUDADES", n_ciudades, "Operación")
+
+
+with stage('kpis'):
+    render_kpis(stats)
+
+st.markdown("<br>", unsafe_allow_html=True)
 
 # ══════════════════════════════════════════════════════════════════════════════
 # TAB 1: PANORAMA
 # ══════════════════════════════════════════════════════════════════════════════
 
-with tab1:
+def render_panorama(stats):
     col1, col2 = st.columns(2)
     
     with col1:
         st.markdown(f"**🏆 Ranking de Ciudades**")
         
-        city_data = df_f.groupby('Ciudad').agg({'Valor Neto': 'sum'}).reset_index()
-        city_data['Unidades'] = df_f.groupby('Ciudad').size().values
-        city_data = city_data.sort_values('Valor Neto', ascending=True)
-        
-        colors_ventas = [get_color(c, CIUDAD_COLORS) for c in city_data['Ciudad']]
-        colors_uds = ['rgba(18,81,96,0.5)' for _ in city_data['Ciudad']]
-        
-        fig = make_subplots(rows=1, cols=2, shared_yaxes=True,
-                           subplot_titles=('Ventas ($)', 'Unidades (#)'),
-                           horizontal_spacing=0.02)
-        
-        fig.add_trace(go.Bar(
-            y=city_data['Ciudad'].tolist(),
-            x=city_data['Valor Neto'].tolist(),
-            orientation='h',
-            marker_color=colors_ventas,
-            text=[format_short(v) for v in city_data['Valor Neto']],
-            textposition='outside',
-            showlegend=False
-        ), row=1, col=1)
-        
-        fig.add_trace(go.Bar(
-            y=city_data['Ciudad'].tolist(),
-            x=city_data['Unidades'].tolist(),
-            orientation='h',
-            marker_color=colors_uds,
-            text=[str(int(u)) for u in city_data['Unidades']],
-            textposition='outside',
-            showlegend=False
-        ), row=1, col=2)
-        
-        fig.update_layout(
-            height=300,
-            margin=dict(l=0, r=50, t=30, b=10),
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-        )
-        fig.update_xaxes(showgrid=False, showticklabels=False)
-        fig.update_yaxes(showgrid=False)
-        
-        st.plotly_chart(fig, use_container_width=True)
+        show_figure('city_ranking', stats)
     
     with col2:
-        st.markdown(f"**📈 Evolución Mensual**")
+        st.markdown(f"**📈 Evolución**")
         
-        if 'Mes' in df_f.columns:
-            meses = ['Ene', 'Feb', 'Mar', 'Abr', 'May', 'Jun', 'Jul', 'Ago', 'Sep', 'Oct', 'Nov', 'Dic']
-            monthly_ventas = df_f.groupby('Mes')['Valor Neto'].sum().reindex(range(1, 13), fill_value=0)
-            monthly_uds = df_f.groupby('Mes').size().reindex(range(1, 13), fill_value=0)
-            
-            fig = make_subplots(specs=[[{"secondary_y": True}]])
-            
-            fig.add_trace(go.Scatter(
-                x=meses,
-                y=monthly_ventas.tolist(),
-                mode='lines+markers',
-                fill='tozeroy',
-                name='Ventas ($)',
-                line=dict(color=CORAL, width=3),
-                fillcolor='rgba(255, 121, 90, 0.2)',
-                marker=dict(size=8, color=CORAL)
-            ), secondary_y=False)
-            
-            fig.add_trace(go.Scatter(
-                x=meses,
-                y=monthly_uds.tolist(),
-                mode='lines+markers',
-                name='Unidades (#)',
-                line=dict(color=TEAL, width=3, dash='dot'),
-                marker=dict(size=8, color=TEAL, symbol='square')
-            ), secondary_y=True)
-            
-            fig.update_layout(
-                height=300,
-                margin=dict(l=0, r=0, t=10, b=10),
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='center', x=0.5),
+        if stats.has('Mes'):
+            granularidades = [g for g in TIME_GRANULARITIES if stats.has(g)]
+            granularidad = st.segmented_control(
+                "Granularidad", granularidades, default='Mes', key="granularidad", label_visibility="collapsed"
             )
-            fig.update_xaxes(showgrid=False)
-            fig.update_yaxes(showgrid=True, gridcolor='rgba(0,0,0,0.05)', tickformat='$.2s', secondary_y=False)
-            fig.update_yaxes(showgrid=False, secondary_y=True)
-            
-            st.plotly_chart(fig, use_container_width=True)
+            show_figure(f'timeline:{granularidad if granularidad in granularidades else "Mes"}', stats)
         else:
             st.info("Se requiere columna 'Fecha'")
 
+
 # ══════════════════════════════════════════════════════════════════════════════
 # TAB 2: AGRUPACIONES
 # ══════════════════════════════════════════════════════════════════════════════
 
-with tab2:
+def render_agrupaciones(stats):
     st.markdown(f"**📢 Distribución por Agrupación**")
     
-    agrup_data = df_f.groupby('Agrupación').agg({'Valor Neto': 'sum'}).reset_index()
-    agrup_data['Unidades'] = df_f.groupby('Agrupación').size().values
-    agrup_data['Ticket'] = agrup_data['Valor Neto'] / agrup_data['Unidades']
-    agrup_data['PctVentas'] = (agrup_data['Valor Neto'] / agrup_data['Valor Neto'].sum() * 100).round(1)
-    agrup_data['PctUds'] = (agrup_data['Unidades'] / agrup_data['Unidades'].sum() * 100).round(1)
-    agrup_data = agrup_data.sort_values('Valor Neto', ascending=False)
-    
-    colors = [get_color(a, AGRUPACION_COLORS) for a in agrup_data['Agrupación']]
+    agrup_data = stats.by('Agrupación').sort_values('Valor Neto', ascending=False)
     
     col1, col2 = st.columns(2)
     
     with col1:
-        fig = go.Figure(go.Pie(
-            labels=agrup_data['Agrupación'].tolist(),
-            values=agrup_data['Valor Neto'].tolist(),
-            hole=0.55,
-            marker=dict(colors=colors),
-            textinfo='percent+label',
-            textposition='outside',
-            textfont=dict(size=10)
-        ))
-        fig.add_annotation(
-            text=f"<b>VENTAS</b><br>{format_short(agrup_data['Valor Neto'].sum())}", 
-            x=0.5, y=0.5, font=dict(size=14, color=TEAL), showarrow=False
-        )
-        fig.update_layout(
-            title='Participación en Ventas ($)',
-            height=350,
-            margin=dict(l=20, r=20, t=50, b=20),
-            showlegend=False,
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        show_figure('agrupacion_sales_share', stats)
     
     with col2:
-        fig = go.Figure(go.Pie(
-            labels=agrup_data['Agrupación'].tolist(),
-            values=agrup_data['Unidades'].tolist(),
-            hole=0.55,
-            marker=dict(colors=colors),
-            textinfo='percent+label',
-            textposition='outside',
-            textfont=dict(size=10)
-        ))
-        fig.add_annotation(
-            text=f"<b>UNIDADES</b><br>{format_num(agrup_data['Unidades'].sum())}", 
-            x=0.5, y=0.5, font=dict(size=14, color=TEAL), showarrow=False
-        )
-        fig.update_layout(
-            title='Participación en Unidades (#)',
-            height=350,
-            margin=dict(l=20, r=20, t=50, b=20),
-            showlegend=False,
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        show_figure('agrupacion_units_share', stats)
     
     # Tabla detalle
     st.markdown(f"**📋 Detalle por Agrupación**")
     
-    for _, row in agrup_data.iterrows():
-        color = get_color(row['Agrupación'], AGRUPACION_COLORS)
-        st.markdown(f"""
-        <div style="display:flex; align-items:center; gap:12px; padding:12px 16px; margin-bottom:8px; background:white; border-radius:12px; border-left:4px solid {color};">
-            <div style="flex:1;"><div style="font-weight:700; color:#1E293B;">{row['Agrupación']}</div></div>
-            <div style="text-align:center; padding:0 1rem; border-left:1px solid #E2E8F0;">
-                <div style="font-size:0.7rem; color:#64748B;">VENTAS</div>
-                <div style="font-weight:700; color:{TEAL};">{format_short(row['Valor Neto'])}</div>
-                <div style="font-size:0.7rem; color:{CORAL};">{row['PctVentas']}%</div>
-            </div>
-            <div style="text-align:center; padding:0 1rem; border-left:1px solid #E2E8F0;">
-                <div style="font-size:0.7rem; color:#64748B;">UNIDADES</div>
-                <div style="font-weight:700; color:{TEAL};">{int(row['Unidades'])}</div>
-                <div style="font-size:0.7rem; color:{CORAL};">{row['PctUds']}%</div>
-            </div>
-            <div style="text-align:center; padding:0 1rem; border-left:1px solid #E2E8F0;">
-                <div style="font-size:0.7rem; color:#64748B;">TICKET</div>
-                <div style="font-weight:700; color:{CORAL};">{format_short(row['Ticket'])}</div>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
+    st.markdown(agrupacion_cards(agrup_data), unsafe_allow_html=True)
     
     # Ticket por agrupación
     st.markdown("<br>", unsafe_allow_html=True)
     st.markdown(f"**💵 Ticket Promedio por Agrupación**")
     
-    agrup_sorted = agrup_data.sort_values('Ticket', ascending=True)
-    colors_sorted = [get_color(a, AGRUPACION_COLORS) for a in agrup_sorted['Agrupación']]
-    
-    fig = go.Figure(go.Bar(
-        y=agrup_sorted['Agrupación'].tolist(),
-        x=agrup_sorted['Ticket'].tolist(),
-        orientation='h',
-        marker_color=colors_sorted,
-        text=[f"{format_short(v)} ({int(u)} uds)" for v, u in zip(agrup_sorted['Ticket'], agrup_sorted['Unidades'])],
-        textposition='outside'
-    ))
-    
-    fig.update_layout(
-        height=400,
-        margin=dict(l=0, r=150, t=10, b=10),
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        xaxis=dict(showgrid=True, gridcolor='rgba(0,0,0,0.05)', tickformat='$.2s'),
-        yaxis=dict(showgrid=False),
-    )
-    
-    st.plotly_chart(fig, use_container_width=True)
+    show_figure('agrupacion_ticket', stats)
+
 
 # ══════════════════════════════════════════════════════════════════════════════
 # TAB 3: PROYECTOS
 # ══════════════════════════════════════════════════════════════════════════════
 
-with tab3:
-    proy_data = df_f.groupby('MacroProyecto').agg({'Valor Neto': 'sum', 'Ciudad': 'first'}).reset_index()
-    proy_data['Unidades'] = df_f.groupby('MacroProyecto').size().values
-    proy_data['Ticket'] = proy_data['Valor Neto'] / proy_data['Unidades']
-    proy_data = proy_data.sort_values('Valor Neto', ascending=False)
+def render_proyectos(stats):
+    proy_data = stats.projects()
     
     col1, col2 = st.columns([1.2, 1])
     
     with col1:
         st.markdown(f"**🏆 Top 15 Proyectos por Ventas**")
         
-        top15 = proy_data.head(15).sort_values('Valor Neto', ascending=True)
-        
-        fig = go.Figure(go.Bar(
-            y=[p.strip() for p in top15['MacroProyecto']],
-            x=top15['Valor Neto'].tolist(),
-            orientation='h',
-            marker_color=CORAL,
-            text=[f"{format_short(v)} • {int(u)} uds" for v, u in zip(top15['Valor Neto'], top15['Unidades'])],
-            textposition='outside'
-        ))
-        
-        fig.update_layout(
-            height=500,
-            margin=dict(l=0, r=120, t=10, b=10),
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            xaxis=dict(showgrid=False, showticklabels=False),
-            yaxis=dict(showgrid=False),
-        )
-        
-        st.plotly_chart(fig, use_container_width=True)
+        show_figure('top_projects_sales', stats)
     
     with col2:
-        st.markdown(f"**📋 Detalle Top 10**")
+        n_detalle = st.segmented_control(
+            "Proyectos", [10, 25, 50, 'Todos'], default=10, key="n_detalle", label_visibility="collapsed"
+        ) or 10
+        detalle = proy_data if n_detalle == 'Todos' else proy_data.head(n_detalle)
+        st.markdown(f"**📋 Detalle Top {len(detalle)}**")
         
-        for i, (_, row) in enumerate(proy_data.head(10).iterrows()):
-            rank = i + 1
-            bg = CORAL if rank <= 3 else TEAL
-            
-            st.markdown(f"""
-            <div style="display:flex; align-items:center; gap:10px; padding:10px; margin-bottom:8px; background:white; border-radius:10px; border:1px solid #E2E8F0;">
-                <div style="width:30px; height:30px; background:{bg}; color:white; border-radius:8px; display:flex; align-items:center; justify-content:center; font-weight:800;">{rank}</div>
-                <div style="flex:1;">
-                    <div style="font-weight:700; font-size:0.85rem; color:#1E293B;">{row['MacroProyecto'].strip()}</div>
-                    <div style="font-size:0.7rem; color:#64748B;">📍 {row['Ciudad']} • 🏠 {int(row['Unidades'])} uds</div>
-                </div>
-                <div style="text-align:right;">
-                    <div style="font-weight:800; color:{LIME}; background:{TEAL}; padding:4px 10px; border-radius:6px;">{format_short(row['Valor Neto'])}</div>
-                    <div style="font-size:0.65rem; color:#64748B; margin-top:2px;">Ticket: {format_short(row['Ticket'])}</div>
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
+        with st.container(height=560 if len(detalle) > 10 else 'content', border=False):
+            st.markdown(project_cards(detalle), unsafe_allow_html=True)
     
     # Unidades por proyecto
     st.markdown("<br>", unsafe_allow_html=True)
     st.markdown(f"**🏠 Top 15 por Unidades Vendidas**")
     
-    proy_uds = proy_data.sort_values('Unidades', ascending=False).head(15)
-    
-    fig = go.Figure(go.Bar(
-        x=[p.strip() for p in proy_uds['MacroProyecto']],
-        y=proy_uds['Unidades'].tolist(),
-        marker_color=TEAL,
-        text=[str(int(u)) for u in proy_uds['Unidades']],
-        textposition='outside'
-    ))
-    
-    fig.update_layout(
-        height=350,
-        margin=dict(l=0, r=0, t=20, b=80),
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        xaxis=dict(showgrid=False, tickangle=-35),
-        yaxis=dict(showgrid=True, gridcolor='rgba(0,0,0,0.05)', title='Unidades'),
-    )
-    
-    st.plotly_chart(fig, use_container_width=True)
+    show_figure('top_projects_units', stats)
+
 
 # ══════════════════════════════════════════════════════════════════════════════
-# INSIGHTS
+# TABS
 # ══════════════════════════════════════════════════════════════════════════════
 
-st.markdown("<br>", unsafe_allow_html=True)
-st.markdown(f"**✨ Insights Ejecutivos**")
-
-agrup_stats = df_f.groupby('Agrupación').agg({'Valor Neto': ['sum', 'count']})
-agrup_stats.columns = ['Total', 'Count']
-agrup_stats['Ticket'] = agrup_stats['Total'] / agrup_stats['Count']
+# Solo se ejecuta la pestaña visible; cambiar de pestaña vuelve a correr este fragmento
+@st.fragment
+def render_tabs(stats):
+    tab1, tab2, tab3 = st.tabs(
+        ["📊 PANORAMA", "📢 AGRUPACIONES", "🏗️ PROYECTOS"], key="tab_activa", on_change="rerun"
+    )
+    tabs = (
+        (tab1, 'panorama', render_panorama),
+        (tab2, 'agrupaciones', render_agrupaciones),
+        (tab3, 'proyectos', render_proyectos),
+    )
+    for tab, name, render in tabs:
+        if tab.open:
+            with tab, stage(f"pestaña:{name}"):
+                render(stats)
 
-i1, i2, i3, i4 = st.columns(4)
+render_tabs(stats)
 
-with i1:
-    top_ticket_agrup = agrup_stats['Ticket'].idxmax()
-    top_ticket_val = agrup_stats.loc[top_ticket_agrup, 'Ticket']
-    st.markdown(f"""
-    <div style="background:white; padding:1rem; border-radius:12px; border-left:4px solid {CYAN};">
-        <div style="font-size:0.7rem; font-weight:700; color:{CYAN};">🌟 MAYOR TICKET</div>
-        <p style="font-size:0.85rem; color:#64748B; margin:0.5rem 0 0 0;">
-            <strong>{top_ticket_agrup}</strong>: <strong style="color:{CORAL};">{format_short(top_ticket_val)}</strong>
-        </p>
-    </div>
-    """, unsafe_allow_html=True)
+# ══════════════════════════════════════════════════════════════════════════════
+# INSIGHTS
+# ══════════════════════════════════════════════════════════════════════════════
 
-with i2:
-    top_vol_agrup = agrup_stats['Count'].idxmax()
-    top_vol_count = int(agrup_stats.loc[top_vol_agrup, 'Count'])
-    st.markdown(f"""
-    <div style="background:white; padding:1rem; border-radius:12px; border-left:4px solid {LIME};">
-        <div style="font-size:0.7rem; font-weight:700; color:{TEAL};">📊 MAYOR VOLUMEN</div>
-        <p style="font-size:0.85rem; color:#64748B; margin:0.5rem 0 0 0;">
-            <strong>{top_vol_agrup}</strong>: <strong style="color:{CORAL};">{top_vol_count}</strong> uds
-        </p>
-    </div>
-    """, unsafe_allow_html=True)
+def render_insights(stats):
+    st.markdown("<br>", unsafe_allow_html=True)
+    st.markdown(f"**✨ Insights Ejecutivos**")
 
-with i3:
-    top_city = df_f.groupby('Ciudad')['Valor Neto'].sum().idxmax()
-    city_pct = (df_f[df_f['Ciudad'] == top_city]['Valor Neto'].sum() / total_ventas * 100)
-    st.markdown(f"""
-    <div style="background:white; padding:1rem; border-radius:12px; border-left:4px solid {LILAC};">
-        <div style="font-size:0.7rem; font-weight:700; color:{LILAC};">🌎 MERCADO LÍDER</div>
-        <p style="font-size:0.85rem; color:#64748B; margin:0.5rem 0 0 0;">
-            <strong>{top_city}</strong>: <strong style="color:{CORAL};">{city_pct:.1f}%</strong> ventas
-        </p>
-    </div>
-    """, unsafe_allow_html=True)
+    for col, card in zip(st.columns(4), insight_cards(stats)):
+        with col:
+            st.markdown(card, unsafe_allow_html=True)
 
-with i4:
-    top_proy = df_f.groupby('MacroProyecto')['Valor Neto'].sum().idxmax().strip()
-    top_proy_val = df_f.groupby('MacroProyecto')['Valor Neto'].sum().max()
-    st.markdown(f"""
-    <div style="background:white; padding:1rem; border-radius:12px; border-left:4px solid {CORAL};">
-        <div style="font-size:0.7rem; font-weight:700; color:{CORAL};">🏆 PROYECTO TOP</div>
-        <p style="font-size:0.85rem; color:#64748B; margin:0.5rem 0 0 0;">
-            <strong>{top_proy}</strong>: <strong style="color:{CORAL};">{format_short(top_proy_val)}</strong>
-        </p>
-    </div>
-    """, unsafe_allow_html=True)
+with stage('insights'):
+    render_insights(stats)
 
 # Footer
 st.markdown("---")
 st.markdown(f"""
 <div style="text-align:center; padding:1rem 0;">
     <p style="color:{TEAL}; font-weight:600;">Dashboard Ejecutivo • Gran Convención CONALTURA 2025</p>
-    <p style="color:#64748B; font-size:0.8rem;">{format_num(len(df_f))} de {format_num(len(df))} registros</p>
+    <p style="color:#64748B; font-size:0.8rem;">{format_num(stats.total_unidades)} de {format_num(dataset.n_rows)} registros</p>
 </div>
 """, unsafe_allow_html=True)
+
+# ══════════════════════════════════════════════════════════════════════════════
+# RENDIMIENTO
+# ══════════════════════════════════════════════════════════════════════════════
+
+if profiling:
+    profiler = get_profiler()
+    profiler.end()
+    with perf_panel.container(), st.expander("⏱️ Rendimiento"):
+        last = profiler.last
+        memoria = f" · Δ memoria {last['memoria_mb']:+.1f} MB" if last['memoria_mb'] is not None else ""
+        st.caption(f"Último rerun: {last['total_s'] * 1000:.0f} ms{memoria}")
+        st.dataframe(profiler.last_table(), hide_index=True, width='stretch')
+        figuras = profiler.last_figures_table()
+        if len(figuras):
+            st.caption(f"Figuras enviadas: {figuras['KB'].sum():.1f} KB de spec JSON")
+            st.dataframe(figuras, hide_index=True, width='stretch')
+        st.caption(f"Percentiles de la sesión ({len(profiler.history)} reruns, ms)")
+        st.dataframe(profiler.percentiles(), hide_index=True, width='stretch')
+
+refresh_while_loading(ingest_job)
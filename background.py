@@ -0,0 +1,123 @@
+"""
+Ingesta en segundo plano: la sabana se procesa en un hilo mientras el
+dashboard muestra lo que ya se leyó.
+"""
+
+import threading
+
+import pyarrow as pa
+
+from aggregates import CubeBuilder
+from dataset import Dataset
+from ingest import concat_chunks, write_snapshot
+
+
+class IngestJob:
+    """Construye un Dataset bloque a bloque en un hilo aparte.
+
+    Mientras corre, `progress` es la fracción de filas leídas (sobre
+    `total_rows`, una estimación) y `partial()` un Dataset con el cubo de lo
+    leído hasta ahora. Al terminar, `result` es el dataset completo o
+    `error` la excepción que detuvo la ingesta.
+
+    Con `keep_frame` los bloques se conservan y el resultado trae la sabana
+    completa; con `snapshot_dir` además se persiste como en `load_sabana`.
+    Con `preview`, una función que devuelve un Dataset de muestra, el hilo la
+    corre antes de empezar y `partial()` entrega esa muestra en vez de lo
+    leído hasta el momento.
+    """
+
+    def __init__(
+        self, dataset_id, chunks, total_rows, keep_frame=True, snapshot_dir=None, preview=None, on_done=None,
+    ):
+        self.dataset_id = dataset_id
+        self.total_rows = max(total_rows, 1)
+        self.keep_frame = keep_frame
+        self.snapshot_dir = snapshot_dir
+        self.on_done = on_done
+        self.preview = None
+        self.result = None
+        self.error = None
+        self._chunks = chunks
+        self._make_preview = preview
+        # Las celdas diarias sirven a las vistas parciales y, sin filas, al resultado
+        self._builder = CubeBuilder(days=True)
+        self._frames = []
+        self._partial = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"ingesta-{dataset_id[:8]}", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    @property
+    def rows_read(self):
+        return self._builder.n_rows
+
+    @property
+    def progress(self):
+        return 1.0 if self.done else min(self.rows_read / self.total_rows, 1.0)
+
+    def partial(self):
+        """Dataset con lo leído hasta ahora (el completo si ya terminó); None si aún no hay filas.
+
+        Cada avance tiene su propio id, así que las cachés por dataset no
+        mezclan una vista parcial con otra ni con la final. Si hay muestra,
+        se entrega la muestra hasta que termine la ingesta.
+        """
+        if self.result is not None:
+            return self.result
+        if self.preview is not None:
+            return self.preview
+        with self._lock:
+            n_rows = self._builder.n_rows
+            if n_rows == 0:
+                return None
+            if self._partial is None or self._partial.n_rows != n_rows:
+                self._partial = Dataset(
+                    f"{self.dataset_id}~{n_rows}", self._builder.result(), n_rows, self._builder.columns,
+                    day_cube=self._builder.day_result(),
+                )
+            return self._partial
+
+    def _run(self):
+        try:
+            if self._make_preview is not None:
+                try:
+                    self.preview = self._make_preview()
+                except Exception:
+                    pass  # sin muestra se muestra lo leído hasta el momento
+            for chunk in self._chunks:
+                with self._lock:
+                    self._builder.add(chunk)
+                    if self.keep_frame:
+                        self._frames.append(chunk)
+            with self._lock:
+                cube = self._builder.result()
+                frame = concat_chunks(self._frames) if self.keep_frame else None
+                day_cube = self._builder.day_result() if frame is None else None
+                self._frames = []
+            if frame is not None and self.snapshot_dir is not None:
+                try:
+                    write_snapshot(frame, self.snapshot_dir, self.dataset_id)
+                except (OSError, pa.ArrowException):
+                    pass
+            self.result = Dataset(
+                self.dataset_id, cube, self._builder.n_rows, self._builder.columns, frame=frame, day_cube=day_cube,
+            )
+        except Exception as e:
+            self.error = e
+            self._frames = []
+        finally:
+            # Una ingesta terminada (o fallida) no retiene el archivo ni la muestra
+            self._chunks = self._make_preview = None
+            self._partial = None
+            self._done.set()
+            if self.on_done is not None:
+                self.on_done(self)
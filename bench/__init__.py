@@ -0,0 +1,5 @@
+"""
+Sabanas sintéticas y micro-benchmarks del pipeline del dashboard.
+
+    python -m bench.run --filas 10000 100000 1000000
+"""
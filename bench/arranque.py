@@ -0,0 +1,109 @@
+"""
+Arranque en frío: cuánto tarda un proceso nuevo en mostrar la pantalla de
+bienvenida y el primer dashboard con datos.
+
+    python -m bench.arranque --repeticiones 5 --filas 50000
+
+Cada repetición corre en un subproceso aparte, sin módulos importados ni
+cachés de Streamlit. Se mide el primer rerun (bienvenida), el rerun con la
+sabana subida y el tiempo de importar cada módulo pesado por separado.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from bench.run import RESULTS_DIR, metadata
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Módulos que la pantalla de bienvenida no debería necesitar
+HEAVY_MODULES = ['pandas', 'pyarrow', 'plotly.graph_objects', 'figures', 'ingest', 'dataset']
+
+# Corre en el subproceso: imprime un JSON con los tiempos en segundos
+_SESSION = """
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+imported = time.perf_counter()
+at = AppTest.from_file({app!r}, default_timeout={timeout})
+at.run()
+welcome = time.perf_counter()
+result = {{
+    'streamlit_s': imported - start,
+    'bienvenida_s': welcome - imported,
+    'pesados_en_bienvenida': [m for m in {heavy!r} if m in sys.modules],
+    'errores': bool(at.exception),
+}}
+if {rows}:
+    from bench.sabana import generate_sabana
+    content = generate_sabana({rows}, seed=0).to_csv(sep=';', index=False).encode('utf-8')
+    at.sidebar.file_uploader[0].upload('sabana.csv', content)
+    loaded = time.perf_counter()
+    at.run()
+    result['primer_dashboard_s'] = time.perf_counter() - loaded
+    result['errores'] = result['errores'] or bool(at.exception)
+print(json.dumps(result))
+"""
+
+_IMPORT = "import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)"
+
+
+def _python(code):
+    out = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return out.stdout.strip().splitlines()[-1]
+
+
+def cold_start(rows, timeout):
+    """Un arranque en un proceso nuevo."""
+    code = _SESSION.format(app=str(ROOT / 'app.py'), timeout=timeout, heavy=HEAVY_MODULES, rows=rows)
+    return json.loads(_python(code))
+
+
+def import_time(module):
+    """Segundos de importar `module` en un proceso nuevo (con sus dependencias)."""
+    return float(_python(_IMPORT.format(module=module)))
+
+
+def _median_ms(values):
+    return round(float(np.median(values)) * 1000, 1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tiempo de arranque en frío del dashboard.")
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--filas', type=int, default=50_000, help="Filas de la sabana del primer dashboard (0 para omitirlo)")
+    parser.add_argument('--timeout', type=float, default=300)
+    parser.add_argument('--salida', default=str(RESULTS_DIR))
+    args = parser.parse_args(argv)
+
+    runs = [cold_start(args.filas, args.timeout) for _ in range(args.repeticiones)]
+    summary = {
+        key: _median_ms([run[key] for run in runs])
+        for key in ('streamlit_s', 'bienvenida_s', 'primer_dashboard_s') if key in runs[0]
+    }
+    summary = {key.replace('_s', '_ms'): value for key, value in summary.items()}
+    summary['pesados_en_bienvenida'] = sorted({m for run in runs for m in run['pesados_en_bienvenida']})
+    summary['errores'] = sum(run['errores'] for run in runs)
+    imports = {module: round(import_time(module) * 1000, 1) for module in HEAVY_MODULES}
+
+    for key, value in summary.items():
+        print(f"{key:<24} {value}")
+    for module, ms in imports.items():
+        print(f"import {module:<20} {ms} ms")
+
+    out_dir = Path(args.salida)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / f"arranque-{datetime.now():%Y%m%d-%H%M%S}.json"
+    report = {'meta': metadata(), 'parametros': vars(args), 'resumen': summary, 'imports_ms': imports, 'corridas': runs}
+    path.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding='utf-8')
+    print(f"→ {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+"""
+Prueba de carga: N sesiones simultáneas del dashboard.
+
+    python -m bench.carga --sesiones 20 --interacciones 30 --filas 100000
+
+Cada sesión sube una sabana sintética y repite cambios de filtros y de
+pestaña al azar. Se reportan percentiles de latencia por rerun, reruns por
+segundo y la memoria residente de cada sesión.
+
+AppTest no es seguro entre hilos (comparte un único `Runtime`), así que
+cada sesión corre en su propio proceso y los errores contados son solo los
+de la app. A diferencia del servidor, las sesiones no comparten el
+registro ni los cachés ni el GIL.
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+from streamlit.testing.v1 import AppTest
+
+from bench.run import RESULTS_DIR, metadata
+from bench.sabana import generate_sabana
+from profiler import PERCENTILES, rss_bytes
+
+APP = str(Path(__file__).resolve().parent.parent / 'app.py')
+
+TABS = ["📊 PANORAMA", "📢 AGRUPACIONES", "🏗️ PROYECTOS"]
+
+
+def sabana_csv(rows, seed):
+    return generate_sabana(rows, seed=seed).to_csv(sep=';', index=False).encode('utf-8')
+
+
+class MemorySampler:
+    """Muestrea la memoria residente del proceso en segundo plano."""
+
+    def __init__(self, interval=0.1):
+        self.interval = interval
+        self.peak = rss_bytes() or 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, rss_bytes() or 0)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def simulate_session(content, interactions, pause, seed, timeout):
+    """Una sesión en su propio proceso: carga y luego `interactions` cambios al azar.
+
+    Devuelve las muestras [(tipo, segundos, error)] y la memoria residente
+    (inicio, pico, final) del proceso.
+    """
+    rng = random.Random(seed)
+    rss_start = rss_bytes() or 0
+    at = AppTest.from_file(APP, default_timeout=timeout)
+    tab = TABS[0]
+    samples = []
+
+    def rerun(kind):
+        at.session_state['tab_activa'] = tab
+        start = time.perf_counter()
+        try:
+            at.run()
+            error = bool(at.exception)
+        except Exception:
+            error = True  # p. ej. el rerun superó el timeout
+        samples.append((kind, time.perf_counter() - start, error))
+
+    with MemorySampler() as sampler:
+        rerun('inicio')
+        at.sidebar.file_uploader[0].upload('sabana.csv', content)
+        rerun('carga')
+        for _ in range(interactions):
+            if pause:
+                time.sleep(pause)
+            filters = list(at.sidebar.multiselect)
+            if filters and rng.random() < 0.6:
+                widget = rng.choice(filters)
+                k = rng.choice([0, 0, 1, 1, 2])
+                widget.set_value(rng.sample(widget.options, min(k, len(widget.options))))
+                rerun('filtro')
+            else:
+                tab = rng.choice(TABS)
+                rerun('pestaña')
+    return samples, (rss_start, sampler.peak, rss_bytes() or 0)
+
+
+def _percentiles(values):
+    ms = np.percentile(np.array(values) * 1000, PERCENTILES)
+    return {f"p{p}_ms": round(float(v), 1) for p, v in zip(PERCENTILES, ms)}
+
+
+def summarize(samples, wall, memory):
+    """`memory` trae (inicio, pico, final) de cada sesión, en bytes."""
+    kinds = {}
+    for kind, secs, _ in samples:
+        kinds.setdefault(kind, []).append(secs)
+    latency = {kind: {'n': len(v), **_percentiles(v), 'max_ms': round(max(v) * 1000, 1)} for kind, v in kinds.items()}
+    interactive = [secs for kind, secs, _ in samples if kind in ('filtro', 'pestaña')]
+    if interactive:
+        latency['interaccion'] = {'n': len(interactive), **_percentiles(interactive)}
+    mb = 1024**2
+    start, peak, end = (np.array(v, dtype='float64') / mb for v in zip(*memory))
+    return {
+        'sesiones': len(memory),
+        'reruns': len(samples),
+        'errores': sum(error for _, _, error in samples),
+        'duracion_s': round(wall, 2),
+        'reruns_por_s': round(len(samples) / wall, 2),
+        'latencia': latency,
+        'memoria_mb': {
+            'inicio': round(float(start.mean()), 1),
+            'pico': round(float(peak.max()), 1),
+            'final': round(float(end.mean()), 1),
+            'por_sesion': round(float((end - start).mean()), 1),
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prueba de carga del dashboard con sesiones simultáneas.")
+    parser.add_argument('--sesiones', type=int, default=10)
+    parser.add_argument('--interacciones', type=int, default=20, help="Cambios de filtro o pestaña por sesión")
+    parser.add_argument('--filas', type=int, default=50_000)
+    parser.add_argument('--pausa', type=float, default=0.0, help="Segundos entre interacciones")
+    parser.add_argument('--archivos-distintos', action='store_true', help="Cada sesión sube su propia sabana")
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--timeout', type=float, default=300)
+    parser.add_argument('--salida', default=str(RESULTS_DIR))
+    args = parser.parse_args(argv)
+
+    seeds = range(args.sesiones) if args.archivos_distintos else [0] * args.sesiones
+    contents = {seed: sabana_csv(args.filas, seed) for seed in set(seeds)}
+
+    # `spawn`: cada proceso arranca limpio, sin heredar el `Runtime` ni los cachés del padre
+    context = multiprocessing.get_context('spawn')
+    start = time.perf_counter()
+    with ProcessPoolExecutor(args.sesiones, mp_context=context) as pool:
+        futures = [
+            pool.submit(simulate_session, contents[seed], args.interacciones, args.pausa, args.semilla + i, args.timeout)
+            for i, seed in enumerate(seeds)
+        ]
+        results = [future.result() for future in futures]
+    wall = time.perf_counter() - start
+    summary = summarize([s for samples, _ in results for s in samples], wall, [rss for _, rss in results])
+
+    for kind, stats in summary['latencia'].items():
+        pcts = '  '.join(f"{k}={v}" for k, v in stats.items() if k != 'n')
+        print(f"{kind:<12} n={stats['n']:<5} {pcts}")
+    print(f"{summary['reruns_por_s']} reruns/s · {summary['errores']} errores · memoria {summary['memoria_mb']}")
+
+    out_dir = Path(args.salida)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / f"carga-{datetime.now():%Y%m%d-%H%M%S}.json"
+    report = {'meta': metadata(), 'parametros': vars(args), 'resumen': summary}
+    path.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding='utf-8')
+    print(f"→ {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+"""
+Micro-benchmarks por etapa del pipeline: carga, filtro, agregados de cada
+pestaña, figuras y formato de etiquetas.
+
+    python -m bench.run --filas 10000 100000 --repeticiones 5
+
+Los resultados se guardan en JSON para comparar entre versiones.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from bench.sabana import FORMATS, generate_sabana, write_sabana
+from dataset import Dataset
+from figures import FIGURES, build_figure, figure_nbytes
+from formatting import format_cop_array, format_num_array, format_short_array
+from ingest import load_sabana
+from sqlengine import SQLDataset
+
+RESULTS_DIR = Path(__file__).parent / 'resultados'
+
+
+def measure(fn, repeats, setup=None):
+    """Segundos de cada repetición de `fn(setup())`; `setup` no se cronometra."""
+    times = []
+    for _ in range(repeats):
+        arg = setup() if setup is not None else None
+        start = time.perf_counter()
+        fn(arg)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def _summary(times):
+    return {
+        'repeticiones': len(times),
+        'min_s': min(times),
+        'mediana_s': float(np.median(times)),
+        'media_s': float(np.mean(times)),
+    }
+
+
+def _filter_states(dataset):
+    ciudades = dataset.options('Ciudad')
+    agrupaciones = dataset.options('Agrupación')
+    states = {
+        'sin_filtro': {},
+        'una_ciudad': {'Ciudad': ciudades[:1]},
+        'ciudad_y_agrupacion': {'Ciudad': ciudades[:2], 'Agrupación': agrupaciones[:1]},
+    }
+    date_range = dataset.date_range()
+    if date_range is not None:
+        hasta = date_range[1]
+        states['ultimo_trimestre'] = {'Día': (hasta - pd.DateOffset(months=3), hasta)}
+        states['ciudad_y_trimestre'] = {'Ciudad': ciudades[:1], 'Día': (hasta - pd.DateOffset(months=3), hasta)}
+    return states
+
+
+def bench_stages(dataset, df, repeats):
+    """Etapas que se repiten en cada rerun, sobre un dataset ya cargado."""
+    results = {}
+    filters = _filter_states(dataset)
+    for name, state in filters.items():
+        results[f"filtro:{name}"] = measure(lambda _: dataset.stats(state), repeats)
+
+    fresh = partial(dataset.stats, filters['una_ciudad'])
+    results['pestana:panorama'] = measure(lambda s: (s.by('Ciudad'), s.has('Mes') and s.timeline('Mes')), repeats, fresh)
+    results['pestana:agrupaciones'] = measure(lambda s: s.by('Agrupación'), repeats, fresh)
+    results['pestana:proyectos'] = measure(lambda s: s.projects(), repeats, fresh)
+    results['insights'] = measure(lambda s: (s.by('Agrupación'), s.by('Ciudad'), s.projects()), repeats, fresh)
+
+    # Figuras con los agregados ya calculados: solo se mide la construcción
+    stats = dataset.stats({})
+    for fig_id in FIGURES:
+        build_figure(fig_id, stats)
+        results[f"figura:{fig_id}"] = measure(lambda _: build_figure(fig_id, stats), repeats)
+
+    valores = df['Valor Neto']
+    results['formato:short'] = measure(lambda _: format_short_array(valores), repeats)
+    results['formato:cop'] = measure(lambda _: format_cop_array(valores), repeats)
+    results['formato:num'] = measure(lambda _: format_num_array(valores), repeats)
+    return results
+
+
+def figure_payloads(dataset):
+    """Bytes del spec JSON de cada figura, sin filtros: lo que pesa en la red."""
+    stats = dataset.stats({})
+    return {fig_id: figure_nbytes(build_figure(fig_id, stats)) for fig_id in FIGURES}
+
+
+def run(rows_list, repeats, formats, engines, cardinalities, data_dir=None):
+    results = []
+
+    def record(rows, fmt, engine, stage, times):
+        results.append({'filas': rows, 'formato': fmt, 'motor': engine, 'etapa': stage, **_summary(times)})
+        print(f"{rows:>10,} {fmt:<17} {engine:<7} {stage:<34} {min(times) * 1000:>10.1f} ms")
+
+    for rows in rows_list:
+        df_raw = generate_sabana(rows, **cardinalities)
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = write_sabana(df_raw, data_dir or tmp, formats)
+            frame = None
+            for fmt, path in paths.items():
+                content = path.read_bytes()
+                # La carga completa es cara: menos repeticiones en archivos grandes
+                load_repeats = repeats if rows <= 100_000 else 1
+                times = measure(lambda _: load_sabana(content, path.name), load_repeats)
+                record(rows, fmt, 'pandas', 'carga', times)
+                if frame is None:
+                    frame = load_sabana(content, path.name)
+        if frame is None:
+            continue
+
+        for engine in engines:
+            if engine == 'pandas':
+                build = partial(Dataset.from_frame, 'bench', frame)
+                times = measure(lambda _: build().cube_index, repeats if rows <= 100_000 else 1)
+                record(rows, '-', engine, 'cubo_e_indice', times)
+            else:
+                build = partial(SQLDataset.from_chunks, 'bench', [frame])
+                times = measure(lambda _: build(), 1)
+                record(rows, '-', engine, 'carga_sql', times)
+            dataset = build()
+            for stage, times in bench_stages(dataset, frame, repeats).items():
+                record(rows, '-', engine, stage, times)
+            payloads = figure_payloads(dataset)
+            for fig_id, nbytes in payloads.items():
+                results.append({'filas': rows, 'formato': '-', 'motor': engine, 'etapa': f"bytes:{fig_id}", 'bytes': nbytes})
+                print(f"{rows:>10,} {'-':<17} {engine:<7} {'bytes:' + fig_id:<34} {nbytes / 1024:>10.1f} KB")
+            print(f"{rows:>10,} {'-':<17} {engine:<7} {'bytes:total':<34} {sum(payloads.values()) / 1024:>10.1f} KB")
+    return results
+
+
+def _git_revision():
+    try:
+        out = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+            cwd=Path(__file__).parent, check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def metadata():
+    import plotly
+    import pyarrow
+    return {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'commit': _git_revision(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'pyarrow': pyarrow.__version__,
+        'plotly': plotly.__version__,
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mide cada etapa del pipeline del dashboard.")
+    parser.add_argument('--filas', type=int, nargs='+', default=[10_000, 100_000])
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--formatos', nargs='+', choices=list(FORMATS), default=list(FORMATS))
+    parser.add_argument('--motores', nargs='+', choices=['pandas', 'sql'], default=['pandas'])
+    parser.add_argument('--proyectos', type=int, default=60)
+    parser.add_argument('--ciudades', type=int, default=5)
+    parser.add_argument('--agrupaciones', type=int, default=9)
+    parser.add_argument('--medios', type=int, default=12)
+    parser.add_argument('--datos', help="Carpeta donde conservar las sabanas generadas")
+    parser.add_argument('--salida', default=str(RESULTS_DIR), help="Carpeta del JSON de resultados")
+    args = parser.parse_args(argv)
+
+    cardinalities = {
+        'proyectos': args.proyectos, 'ciudades': args.ciudades,
+        'agrupaciones': args.agrupaciones, 'medios': args.medios,
+    }
+    results = run(args.filas, args.repeticiones, args.formatos, args.motores, cardinalities, args.datos)
+
+    out_dir = Path(args.salida)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / f"bench-{datetime.now():%Y%m%d-%H%M%S}.json"
+    report = {'meta': metadata(), 'parametros': {**vars(args), **cardinalities}, 'resultados': results}
+    path.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding='utf-8')
+    print(f"→ {path}")
+
+
+if __name__ == '__main__':
+    main()
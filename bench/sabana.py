@@ -0,0 +1,119 @@
+"""
+Generador de sabanas sintéticas con el esquema real de la exportación del CRM.
+
+    python -m bench.sabana --filas 1000000 --salida /tmp/sabanas
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from theme import AGRUPACION_COLORS, CIUDAD_COLORS
+
+MEDIOS = [
+    'Facebook', 'Instagram', 'Google', 'TikTok', 'Valla', 'Radio', 'Prensa', 'Volante',
+    'Sala de Ventas', 'Referido', 'Feria', 'Portal Inmobiliario', 'Email', 'WhatsApp',
+]
+
+# Límite de filas de una hoja de Excel (sin contar el encabezado)
+XLSX_MAX_ROWS = 1_048_575
+
+FORMATS = {
+    'csv_punto_y_coma': ('sabana_pyc.csv', ';'),
+    'csv_coma': ('sabana_coma.csv', ','),
+    'xlsx': ('sabana.xlsx', None),
+}
+
+
+def _names(real, n, prefix):
+    # Nombres reales primero; si se piden más, se completan con genéricos
+    return (list(real) + [f"{prefix} {i}" for i in range(len(real) + 1, n + 1)])[:n]
+
+
+def _zipf_weights(n, skew):
+    weights = 1 / np.arange(1, n + 1) ** skew
+    return weights / weights.sum()
+
+
+def generate_sabana(rows, proyectos=60, ciudades=5, agrupaciones=9, medios=12, anios=1, seed=0):
+    """Sabana con columnas y formatos como los del CRM.
+
+    Proyectos y medios siguen una distribución sesgada (pocos concentran las
+    ventas); los nombres traen espacios sobrantes y una parte de agrupaciones
+    y medios llega vacía, como en las exportaciones reales.
+    """
+    rng = np.random.default_rng(seed)
+    ciudad_names = np.array(_names(CIUDAD_COLORS, ciudades, 'Ciudad'))
+    agrup_names = np.array(_names(AGRUPACION_COLORS, agrupaciones, 'Agrupación'), dtype=object)
+    medio_names = np.array(_names(MEDIOS, medios, 'Medio'), dtype=object)
+    proyecto_names = np.array([f" Proyecto {i} " if i % 3 == 0 else f"Proyecto {i}" for i in range(1, proyectos + 1)])
+
+    # Cada proyecto pertenece a una ciudad, como en la operación real
+    proyecto_ciudad = rng.integers(0, ciudades, proyectos)
+    proyecto = rng.choice(proyectos, rows, p=_zipf_weights(proyectos, 0.8))
+
+    agrupacion = agrup_names[rng.choice(agrupaciones, rows, p=_zipf_weights(agrupaciones, 1.0))]
+    agrupacion[rng.random(rows) < 0.02] = None
+    medio = medio_names[rng.choice(medios, rows, p=_zipf_weights(medios, 0.7))]
+    medio[rng.random(rows) < 0.05] = None
+
+    start = pd.Timestamp('2025-01-01') - pd.DateOffset(years=anios - 1)
+    days = (pd.Timestamp('2025-12-31') - start).days + 1
+    fecha = start + pd.to_timedelta(rng.integers(0, days, rows), unit='D')
+    valor = np.round(rng.lognormal(np.log(4e8), 0.45, rows), -3)
+
+    return pd.DataFrame({
+        'Fecha': fecha.strftime('%Y-%m-%d'),
+        'Valor Neto': valor.astype(np.int64),
+        'MacroProyecto': proyecto_names[proyecto],
+        'Ciudad': ciudad_names[proyecto_ciudad[proyecto]],
+        'Agrupación': agrupacion,
+        'Medio Publicitario': medio,
+    })
+
+
+def write_sabana(df, out_dir, formats=tuple(FORMATS)):
+    """Escribe la sabana en cada formato pedido; devuelve {formato: ruta}.
+
+    El XLSX se omite si la sabana no cabe en una hoja.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    paths = {}
+    for fmt in formats:
+        filename, sep = FORMATS[fmt]
+        path = out_dir / filename
+        if sep is not None:
+            df.to_csv(path, sep=sep, index=False)
+        elif len(df) <= XLSX_MAX_ROWS:
+            df.to_excel(path, index=False)
+        else:
+            continue
+        paths[fmt] = path
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera una sabana sintética de mercadeo.")
+    parser.add_argument('--filas', type=int, default=100_000)
+    parser.add_argument('--proyectos', type=int, default=60)
+    parser.add_argument('--ciudades', type=int, default=5)
+    parser.add_argument('--agrupaciones', type=int, default=9)
+    parser.add_argument('--medios', type=int, default=12)
+    parser.add_argument('--anios', type=int, default=1, help="Años de historia, terminando en 2025")
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--formatos', nargs='+', choices=list(FORMATS), default=list(FORMATS))
+    parser.add_argument('--salida', default='.')
+    args = parser.parse_args(argv)
+
+    df = generate_sabana(
+        args.filas, args.proyectos, args.ciudades, args.agrupaciones, args.medios, args.anios, args.semilla,
+    )
+    for fmt, path in write_sabana(df, args.salida, args.formatos).items():
+        print(f"{fmt}: {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Caché LRU acotada por número de entradas y por tamaño en bytes.
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Caché segura entre hilos; expulsa primero lo usado hace más tiempo.
+
+    `sizeof` calcula el peso de cada valor. Un valor que por sí solo supera
+    `max_bytes` no se guarda. Las claves para las que `can_evict` devuelve
+    False no se expulsan, aunque la caché quede por encima de sus límites.
+    """
+
+    def __init__(self, max_entries=8, max_bytes=None, sizeof=None, can_evict=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof or (lambda value: 0)
+        self.can_evict = can_evict or (lambda key: True)
+        self._data = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key][0]
+
+    def put(self, key, value):
+        size = self.sizeof(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self._bytes -= self._data.pop(key)[1]
+            self._data[key] = (value, size)
+            self._bytes += size
+            for old in list(self._data):
+                if not self._over_limits():
+                    break
+                if old != key and self.can_evict(old):
+                    self._bytes -= self._data.pop(old)[1]
+
+    def _over_limits(self):
+        return len(self._data) > self.max_entries or (
+            self.max_bytes is not None and self._bytes > self.max_bytes
+        )
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def keys(self):
+        """Claves de la más antigua a la más reciente."""
+        with self._lock:
+            return list(self._data)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    @property
+    def nbytes(self):
+        return self._bytes
+
+
+_MISSING = object()
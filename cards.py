@@ -0,0 +1,115 @@
+"""
+Tarjetas HTML de detalle: una plantilla aplicada sobre todo el agregado y
+enviada al navegador como un solo elemento.
+"""
+
+import html
+
+import numpy as np
+import pandas as pd
+
+from formatting import format_short, format_short_array
+from theme import AGRUPACION_COLORS, CORAL, CYAN, LILAC, LIME, TEAL, get_color
+
+AGRUPACION_CARD = (
+    '<div style="display:flex; align-items:center; gap:12px; padding:12px 16px; margin-bottom:8px; background:white; border-radius:12px; border-left:4px solid {color};">'
+    '<div style="flex:1;"><div style="font-weight:700; color:#1E293B;">{name}</div></div>'
+    '<div style="text-align:center; padding:0 1rem; border-left:1px solid #E2E8F0;">'
+    '<div style="font-size:0.7rem; color:#64748B;">VENTAS</div>'
+    f'<div style="font-weight:700; color:{TEAL};">{{ventas}}</div>'
+    f'<div style="font-size:0.7rem; color:{CORAL};">{{pct_ventas}}%</div>'
+    '</div>'
+    '<div style="text-align:center; padding:0 1rem; border-left:1px solid #E2E8F0;">'
+    '<div style="font-size:0.7rem; color:#64748B;">UNIDADES</div>'
+    f'<div style="font-weight:700; color:{TEAL};">{{unidades}}</div>'
+    f'<div style="font-size:0.7rem; color:{CORAL};">{{pct_uds}}%</div>'
+    '</div>'
+    '<div style="text-align:center; padding:0 1rem; border-left:1px solid #E2E8F0;">'
+    '<div style="font-size:0.7rem; color:#64748B;">TICKET</div>'
+    f'<div style="font-weight:700; color:{CORAL};">{{ticket}}</div>'
+    '</div>'
+    '</div>'
+)
+
+PROJECT_CARD = (
+    '<div style="display:flex; align-items:center; gap:10px; padding:10px; margin-bottom:8px; background:white; border-radius:10px; border:1px solid #E2E8F0;">'
+    '<div style="width:30px; height:30px; background:{bg}; color:white; border-radius:8px; display:flex; align-items:center; justify-content:center; font-weight:800;">{rank}</div>'
+    '<div style="flex:1;">'
+    '<div style="font-weight:700; font-size:0.85rem; color:#1E293B;">{name}</div>'
+    '<div style="font-size:0.7rem; color:#64748B;">📍 {ciudad} • 🏠 {unidades} uds</div>'
+    '</div>'
+    '<div style="text-align:right;">'
+    f'<div style="font-weight:800; color:{LIME}; background:{TEAL}; padding:4px 10px; border-radius:6px;">{{ventas}}</div>'
+    '<div style="font-size:0.65rem; color:#64748B; margin-top:2px;">Ticket: {ticket}</div>'
+    '</div>'
+    '</div>'
+)
+
+INSIGHT_CARD = (
+    '<div style="background:white; padding:1rem; border-radius:12px; border-left:4px solid {border};">'
+    '<div style="font-size:0.7rem; font-weight:700; color:{color};">{title}</div>'
+    '<p style="font-size:0.85rem; color:#64748B; margin:0.5rem 0 0 0;">'
+    f'<strong>{{name}}</strong>: <strong style="color:{CORAL};">{{value}}</strong>{{suffix}}'
+    '</p>'
+    '</div>'
+)
+
+
+def _escape(values):
+    return values.astype(str).str.strip().map(html.escape)
+
+
+def render_cards(template, fields):
+    """Aplica `template` a cada fila de `fields` (columnas = campos) y une el HTML."""
+    return '\n'.join(template.format_map(rec) for rec in fields.to_dict('records'))
+
+
+def agrupacion_cards(agrup_data):
+    names = agrup_data['Agrupación'].astype(str)
+    fields = pd.DataFrame({
+        'color': names.map(lambda name: get_color(name, AGRUPACION_COLORS)),
+        'name': _escape(names),
+        'ventas': format_short_array(agrup_data['Valor Neto']),
+        'pct_ventas': agrup_data['PctVentas'],
+        'unidades': agrup_data['Unidades'].astype(int),
+        'pct_uds': agrup_data['PctUds'],
+        'ticket': format_short_array(agrup_data['Ticket']),
+    })
+    return render_cards(AGRUPACION_CARD, fields)
+
+
+def project_cards(proy_data):
+    """Tarjetas de ranking; los tres primeros se destacan en coral."""
+    rank = np.arange(1, len(proy_data) + 1)
+    fields = pd.DataFrame({
+        'bg': np.where(rank <= 3, CORAL, TEAL),
+        'rank': rank,
+        'name': _escape(proy_data['MacroProyecto']).to_numpy(),
+        'ciudad': _escape(proy_data['Ciudad']).to_numpy(),
+        'unidades': proy_data['Unidades'].astype(int).to_numpy(),
+        'ventas': format_short_array(proy_data['Valor Neto']).to_numpy(),
+        'ticket': format_short_array(proy_data['Ticket']).to_numpy(),
+    })
+    return render_cards(PROJECT_CARD, fields)
+
+
+def insight_cards(stats):
+    """Las cuatro tarjetas de Insights Ejecutivos: ticket, volumen, mercado y proyecto líderes."""
+    agrup_stats = stats.by('Agrupación').set_index('Agrupación')
+    city_totals = stats.by('Ciudad').set_index('Ciudad')
+    top_ticket = agrup_stats['Ticket'].idxmax()
+    top_vol = agrup_stats['Unidades'].idxmax()
+    top_city = city_totals['Valor Neto'].idxmax()
+    top_proy = stats.projects().iloc[0]
+    cards = [
+        (CYAN, CYAN, "🌟 MAYOR TICKET", top_ticket, format_short(agrup_stats.loc[top_ticket, 'Ticket']), ''),
+        (LIME, TEAL, "📊 MAYOR VOLUMEN", top_vol, int(agrup_stats.loc[top_vol, 'Unidades']), ' uds'),
+        (LILAC, LILAC, "🌎 MERCADO LÍDER", top_city, f"{city_totals.loc[top_city, 'PctVentas']:.1f}%", ' ventas'),
+        (CORAL, CORAL, "🏆 PROYECTO TOP", top_proy['MacroProyecto'], format_short(top_proy['Valor Neto']), ''),
+    ]
+    return [
+        INSIGHT_CARD.format(
+            border=border, color=color, title=title, name=html.escape(str(name).strip()), value=value, suffix=suffix,
+        )
+        for border, color, title, name, value, suffix in cards
+    ]
@@ -0,0 +1,282 @@
+"""
+Dataset cargado: cubo de agregados, índice de filtros y, si cabe en memoria,
+la sabana limpia completa.
+"""
+
+import itertools
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from aggregates import (
+    CUBE_PERIOD, DATE_DIMENSION, FILTER_DIMENSIONS, CubeBuilder, DashboardStats, RowIndex, TimeIndex,
+    append_to_cube, append_to_day_cells, build_cube, daily_totals, filter_key, split_months,
+)
+from ingest import concat_chunks, frame_nbytes, schema_report
+
+# Columnas de las filas (o celdas diarias) que usan los agregados
+_DAY_COLUMNS = FILTER_DIMENSIONS + [DATE_DIMENSION, 'Valor Neto', 'Unidades', 'Primera']
+
+# Número de cada objeto Dataset: dos cargas del mismo archivo comparten id pero no número
+_INSTANCES = itertools.count()
+
+
+class Dataset:
+    """Todo lo que el dashboard necesita de una sabana, identificado por su hash.
+
+    Las filas se guardan como una lista de bloques: la sabana inicial y lo
+    que se agregue después con `append`. No hay filas cuando la sabana se
+    ingirió por bloques: en ese caso se conservan el cubo y, si se armaron,
+    las celdas diarias (`day_cube`). El cubo llega hasta el mes; el filtro
+    de fechas y la evolución por día o semana leen de las filas o, sin
+    ellas, de las celdas diarias.
+    """
+
+    def __init__(self, dataset_id, cube, n_rows, columns, frame=None, day_cube=None):
+        self.id = dataset_id
+        self.n_rows = n_rows
+        self.columns = columns
+        self.day_cube = day_cube
+        self._chunks = [frame] if frame is not None else []
+        self._cube = cube
+        self._cube_index = None
+        self._time_index = None
+        self._row_index = None
+        self._date_range = None
+        self._instance = next(_INSTANCES)
+
+    @classmethod
+    def from_frame(cls, dataset_id, df):
+        # El cubo se construye al primer uso, después de validar las columnas
+        return cls(dataset_id, None, len(df), list(df.columns), frame=df)
+
+    @property
+    def has_rows(self):
+        return bool(self._chunks)
+
+    @property
+    def frame(self):
+        """La sabana completa (una copia si tiene varios bloques); None si no se conservaron las filas."""
+        if not self._chunks:
+            return None
+        return self._chunks[0] if len(self._chunks) == 1 else concat_chunks(self._chunks)
+
+    @property
+    def cube(self):
+        if self._cube is None:
+            self._cube = build_cube(self.frame)
+        return self._cube
+
+    @property
+    def cube_index(self):
+        if self._cube_index is None:
+            self._cube_index = RowIndex(self.cube, FILTER_DIMENSIONS)
+        return self._cube_index
+
+    def _day_parts(self):
+        """Los bloques de los que salen los días: las filas o, sin ellas, las celdas diarias."""
+        if self._chunks:
+            return self._chunks
+        return [self.day_cube] if self.day_cube is not None else []
+
+    def _offsets(self):
+        """Posición de inicio de cada bloque de `_day_parts`, más el total al final."""
+        return np.cumsum([0] + [len(part) for part in self._day_parts()])
+
+    @property
+    def has_days(self):
+        parts = self._day_parts()
+        return bool(parts) and DATE_DIMENSION in parts[0].columns
+
+    @property
+    def row_index(self):
+        # Índice sobre las filas o celdas diarias, no sobre el cubo: se arma la primera vez que se
+        # filtra por fecha, se pide la evolución por día o semana, o se exporta
+        if self._row_index is None:
+            parts, offsets = self._day_parts(), self._offsets()
+            index = RowIndex(parts[0], FILTER_DIMENSIONS)
+            for part, offset in zip(parts[1:], offsets[1:]):
+                index = index.extended(part, offset)
+            self._row_index = index
+        return self._row_index
+
+    @property
+    def time_index(self):
+        if self._time_index is None:
+            parts, offsets = self._day_parts(), self._offsets()
+            index = TimeIndex(parts[0][DATE_DIMENSION])
+            for part, offset in zip(parts[1:], offsets[1:]):
+                index = index.extended(part[DATE_DIMENSION], offset)
+            self._time_index = index
+        return self._time_index
+
+    @classmethod
+    def from_chunks(cls, dataset_id, chunks, days=True):
+        """Dataset sin filas, agregado bloque a bloque; con `days` también arma las celdas diarias."""
+        builder = CubeBuilder(days=days)
+        for chunk in chunks:
+            builder.add(chunk)
+        return cls(dataset_id, builder.result(), builder.n_rows, builder.columns or [], day_cube=builder.day_result())
+
+    def append(self, dataset_id, rows):
+        """Nuevo Dataset con `rows` (ya limpias) al final de la sabana; este no cambia.
+
+        Solo se agregan las filas nuevas y sus celdas se suman por llave al
+        cubo. El nuevo Dataset comparte los bloques de filas de este, y los
+        índices ya armados se extienden con las filas nuevas.
+        """
+        cube = append_to_cube(self.cube, rows, self.n_rows)
+        columns = self.columns + [c for c in rows.columns if c not in self.columns]
+        day_cube = None
+        if self._chunks:
+            new, offset = rows, self.n_rows
+        elif self.day_cube is not None and DATE_DIMENSION in rows.columns:
+            # Las celdas existentes no cambian de posición: las nuevas quedan al final
+            day_cube = append_to_day_cells(self.day_cube, rows, self.n_rows)
+            new, offset = day_cube.iloc[len(self.day_cube):], len(self.day_cube)
+        else:
+            new = None
+        dataset = Dataset(dataset_id, cube, self.n_rows + len(rows), columns, day_cube=day_cube)
+        dataset._chunks = self._chunks + [rows] if self._chunks else []
+        if new is not None:
+            if self._row_index is not None:
+                dataset._row_index = self._row_index.extended(new, offset)
+            if self._time_index is not None:
+                dataset._time_index = self._time_index.extended(new[DATE_DIMENSION], offset)
+            if self._date_range is not None:
+                # Sin 'Día' (la sabana no trae 'Fecha') el rango sigue vacío, como en `date_range`
+                bounds = [self._date_range]
+                if self.has_days and DATE_DIMENSION in new.columns:
+                    bounds.append(_bounds(new[DATE_DIMENSION]))
+                bounds = [b for b in bounds if b]
+                dataset._date_range = (min(b[0] for b in bounds), max(b[1] for b in bounds)) if bounds else ()
+        return dataset
+
+    @property
+    def nbytes(self):
+        parts = self._chunks + [part for part in (self._cube, self.day_cube) if part is not None]
+        return sum(frame_nbytes(part) for part in parts)
+
+    def options(self, dim):
+        """Valores de `dim` para los filtros, ordenados."""
+        return sorted(self.cube[dim].unique().tolist())
+
+    def date_range(self):
+        """Primera y última fecha de la sabana; None si no trae 'Fecha'."""
+        if self._date_range is None:
+            bounds = ()
+            if self.has_days:
+                found = [b for b in (_bounds(part[DATE_DIMENSION]) for part in self._day_parts()) if b]
+                if found:
+                    bounds = (min(b[0] for b in found), max(b[1] for b in found))
+            self._date_range = bounds
+        return self._date_range or None
+
+    def schema(self):
+        if not self._chunks:
+            return schema_report(self.cube)
+        report = schema_report(self._chunks[0])
+        for chunk in self._chunks[1:]:
+            memory = schema_report(chunk).set_index('Columna')['Memoria (MB)']
+            report['Memoria (MB)'] += report['Columna'].map(memory).fillna(0)
+        return report
+
+    def _day_positions(self, filters, dates=None):
+        """Posiciones de las filas (o celdas diarias) que cumplen los filtros de dimensión y el rango `dates`; None si todas."""
+        positions = self.row_index.select(filters)
+        if dates:
+            positions = self.time_index.select(*dates, positions=positions)
+        return positions
+
+    def _take(self, positions, columns):
+        """Las filas en `positions` (ordenadas) de los bloques de `_day_parts`, con `columns`."""
+        parts, offsets = self._day_parts(), self._offsets()
+        bounds = np.searchsorted(positions, offsets)
+        pieces = []
+        for part, offset, lo, hi in zip(parts, offsets, bounds[:-1], bounds[1:]):
+            if hi > lo or (not pieces and part is parts[-1]):
+                piece = part[[c for c in columns if c in part.columns]].take(positions[lo:hi] - offset)
+                pieces.append(piece.reindex(columns=columns) if len(piece.columns) < len(columns) else piece)
+        return pieces[0] if len(pieces) == 1 else pd.concat(pieces, ignore_index=True)
+
+    def _day_rows(self, positions):
+        """Las columnas que usan los agregados, en `positions`."""
+        return self._take(positions, [c for c in _DAY_COLUMNS if c in self._day_parts()[0].columns])
+
+    def select(self, filters):
+        """Celdas del cubo que cumplen `filters`, incluido el rango de fechas.
+
+        Los meses que el rango cubre enteros salen del cubo; los días de los
+        meses que corta se agregan desde las filas o las celdas diarias (sin
+        ellas, esos meses quedan fuera).
+        """
+        positions = self.cube_index.select(filters)
+        cube = self.cube if positions is None else self.cube.iloc[positions]
+        dates = filters.get(DATE_DIMENSION)
+        if not dates or CUBE_PERIOD not in cube.columns:
+            return cube
+        months, edges = split_months(*dates)
+        parts = []
+        if months is not None:
+            period = cube[CUBE_PERIOD]
+            parts.append(cube[(period >= months[0]) & (period < months[1])])
+        if edges and self.has_days:
+            positions = np.sort(np.concatenate([self._day_positions(filters, edge) for edge in edges]))
+            parts.append(build_cube(self._day_rows(positions), first=positions))
+        if not parts:
+            return cube.iloc[:0]
+        return parts[0] if len(parts) == 1 else pd.concat(parts, ignore_index=True)
+
+    def _daily(self, filters):
+        """Ventas y unidades por día de `filters`, desde las filas o las celdas diarias."""
+        positions = self._day_positions(filters, filters.get(DATE_DIMENSION))
+        parts = self._day_parts() if positions is None else [self._day_rows(positions)]
+        totals = [
+            daily_totals(rows[DATE_DIMENSION], rows['Valor Neto'], rows['Unidades'] if 'Unidades' in rows.columns else None)
+            for rows in parts
+        ]
+        if len(totals) == 1:
+            return totals[0]
+        return pd.concat(totals).groupby(DATE_DIMENSION, sort=True).sum().reset_index()
+
+    def iter_rows(self, filters, chunk_rows):
+        """Filas de la sabana que cumplen `filters`, en bloques de hasta `chunk_rows`.
+
+        Sin filas que cumplan, produce un bloque vacío con las columnas, para
+        que la exportación lleve encabezado. No produce nada si la sabana se
+        ingirió por bloques y solo se conservó el cubo.
+        """
+        if not self._chunks:
+            return
+        dates = filters.get(DATE_DIMENSION) if DATE_DIMENSION in self.columns else None
+        # 'Día' se deriva de 'Fecha': se exporta la sabana con sus columnas originales
+        keep = [c for c in self.columns if c != DATE_DIMENSION or 'Fecha' not in self.columns]
+        positions = self._day_positions(filters, dates)
+        if positions is None:
+            positions = np.arange(self.n_rows)
+        for start in range(0, max(len(positions), 1), chunk_rows):
+            yield self._take(positions[start:start + chunk_rows], keep)
+
+    def stats_key(self, filters):
+        """Llave de las estadísticas de `filters` en las cachés.
+
+        Va por objeto y no solo por contenido: las estadísticas guardan una
+        referencia débil a su Dataset, y uno expulsado del registro no debe
+        servirle al que se cargue después con el mismo archivo.
+        """
+        return (self.id, self._instance, filter_key(filters))
+
+    def stats(self, filters):
+        days = None
+        if self.has_days:
+            # Referencia débil: una estadística en caché no retiene un dataset que ya salió del registro
+            ref = weakref.ref(self)
+            days = lambda: ref()._daily(filters)
+        return DashboardStats(self.select(filters), key=self.stats_key(filters), days=days)
+
+
+def _bounds(days):
+    """(primera, última) fecha de `days`; vacío si no hay ninguna."""
+    first, last = days.min(), days.max()
+    return () if pd.isna(first) else (first, last)
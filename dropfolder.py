@@ -0,0 +1,154 @@
+"""
+Carpeta vigilada: las exportaciones diarias del CRM se dejan en una carpeta
+y de cada archivo solo se agregan las filas que aún no estaban.
+"""
+
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from dataset import Dataset
+from ingest import (
+    REQUIRED_COLUMNS, USED_COLUMNS, clean_sabana, content_hash, read_csv_rows, read_sabana, row_hashes,
+)
+
+DROP_EXTENSIONS = ('.csv', '.xlsx', '.xls')
+
+# Bytes del inicio de cada archivo que se guardan para descartar rápido los que no son su continuación
+HEAD_BYTES = 4096
+
+
+class DropFolder:
+    """Une las sabanas que aparecen en `path` en un solo Dataset, sin repetir filas.
+
+    Un archivo nuevo o modificado (por mtime y tamaño, y luego por hash de
+    contenido) solo aporta sus filas nuevas, reconocidas por hash de fila o
+    por la columna `key` si la exportación trae un identificador de venta.
+    Si un CSV es otro ya leído con filas agregadas al final, solo se lee ese
+    final. Es de solo agregar: una venta que cambia en el CRM entra como fila
+    nueva y las que desaparecen no se retiran.
+
+    Cada actualización produce un Dataset nuevo (el anterior no cambia) y se
+    entrega a `on_update`.
+    """
+
+    def __init__(self, path, key=None, on_update=None, settle=2.0):
+        self.path = Path(path)
+        self.key = key
+        self.on_update = on_update
+        self.settle = settle
+        self.dataset = None
+        self.errors = {}
+        self._files = {}
+        self._hashes = np.empty(0, dtype=np.uint64)  # ordenados, con repetidos
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self, interval=30.0):
+        """Revisa la carpeta cada `interval` segundos en un hilo aparte."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._watch, args=(interval,), name='carpeta-vigilada', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _watch(self, interval):
+        while True:
+            self.scan()
+            if self._stop.wait(interval):
+                return
+
+    def scan(self):
+        """Procesa los archivos nuevos o modificados; devuelve cuántas filas se agregaron."""
+        with self._lock:
+            added = 0
+            for file in self._changed_files():
+                try:
+                    added += self._ingest(file)
+                    self.errors.pop(file.name, None)
+                except Exception as e:
+                    self.errors[file.name] = str(e)
+            return added
+
+    def _changed_files(self):
+        if not self.path.is_dir():
+            return []
+        now = time.time()
+        changed = []
+        for file in self.path.iterdir():
+            if file.name.startswith(('.', '~$')) or file.suffix.lower() not in DROP_EXTENSIONS or not file.is_file():
+                continue
+            stat = file.stat()
+            # Un archivo que se sigue escribiendo se deja para la próxima revisión
+            if now - stat.st_mtime < self.settle:
+                continue
+            known = self._files.get(file.name)
+            if known is None or (known['mtime'], known['size']) != (stat.st_mtime_ns, stat.st_size):
+                changed.append((stat.st_mtime_ns, file))
+        return [file for _, file in sorted(changed)]
+
+    def _ingest(self, file):
+        stat = file.stat()
+        content = file.read_bytes()
+        digest = content_hash(content)
+        known = self._files.get(file.name)
+        is_csv = file.suffix.lower() == '.csv'
+        start = self._appended_from(file.name, content) if is_csv else 0
+        self._files[file.name] = {
+            'mtime': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'digest': digest,
+            'length': len(content),
+            'head': content[:HEAD_BYTES],
+        }
+        if known is not None and known['digest'] == digest:
+            return 0
+        rows = read_csv_rows(content, start) if is_csv else clean_sabana(read_sabana(content, file.name))
+        missing = [c for c in REQUIRED_COLUMNS if c not in rows.columns]
+        if self.key and self.key not in rows.columns:
+            missing.append(self.key)
+        if missing:
+            raise ValueError(f"Faltan columnas: {missing}")
+        return self._append(rows, digest, continuation=start > 0)
+
+    def _appended_from(self, name, content):
+        """Byte desde el que `content` continúa un CSV ya leído (primero el del mismo nombre); 0 si no."""
+        known = sorted(self._files.items(), key=lambda item: (item[0] != name, -item[1]['mtime']))
+        view = memoryview(content)
+        for _, record in known:
+            n = record['length']
+            if not 0 < n < len(content) or content[n - 1:n] != b'\n':
+                continue
+            if content[:len(record['head'])] == record['head'] and content_hash(view[:n]) == record['digest']:
+                return n
+        return 0
+
+    def _append(self, rows, digest, continuation=False):
+        hashes = row_hashes(rows, [self.key] if self.key else USED_COLUMNS)
+        seen = np.searchsorted(self._hashes, hashes, 'right') - np.searchsorted(self._hashes, hashes, 'left')
+        occurrence = pd.Series(hashes).groupby(hashes).cumcount().to_numpy()
+        if self.key:
+            new = (seen == 0) & (occurrence == 0)
+        elif continuation:
+            # Lo agregado al final de un archivo ya leído es nuevo, aunque repita una fila anterior
+            new = np.ones(len(rows), dtype=bool)
+        else:
+            # Dos filas idénticas pueden ser dos ventas: es nueva si su hash aparece más veces que antes
+            new = occurrence >= seen
+        if not new.any():
+            return 0
+        rows = rows[new].reset_index(drop=True)
+        self._hashes = np.sort(np.concatenate([self._hashes, hashes[new]]), kind='stable')
+        if self.dataset is None:
+            self.dataset = Dataset.from_frame(digest, rows)
+        else:
+            self.dataset = self.dataset.append(content_hash(f"{self.dataset.id}:{digest}".encode()), rows)
+        if self.on_update is not None:
+            self.on_update(self.dataset)
+        return len(rows)
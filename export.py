@@ -0,0 +1,128 @@
+"""
+Exportación de las filas filtradas y de las tablas de agregados a CSV,
+Parquet o XLSX, bloque a bloque.
+
+Cada bloque se escribe apenas llega y se descarta: la memoria depende del
+tamaño del bloque, no del de la exportación.
+"""
+
+import codecs
+import os
+import tempfile
+import weakref
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Filas por bloque al leer y escribir una exportación
+EXPORT_CHUNK_ROWS = 100_000
+
+# Filas de datos por hoja de Excel (el límite del formato, menos el encabezado)
+EXCEL_MAX_ROWS = 1_048_575
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+def write_csv(chunks, sink):
+    """CSV con ';' y BOM, como lo abre Excel en español."""
+    sink.write(codecs.BOM_UTF8)
+    header = True
+    for chunk in chunks:
+        sink.write(chunk.to_csv(sep=';', index=False, header=header).encode('utf-8'))
+        header = False
+
+
+def _arrow_table(chunk, schema=None):
+    # Texto para las columnas de objetos: cada bloque debe tener el mismo esquema
+    chunk = chunk.copy()
+    for col in chunk.columns:
+        if chunk[col].dtype == object:
+            chunk[col] = chunk[col].where(chunk[col].isna(), chunk[col].astype(str))
+    table = pa.Table.from_pandas(chunk, preserve_index=False)
+    return table if schema is None else table.cast(schema)
+
+
+def write_parquet(chunks, sink):
+    """Parquet con un row group por bloque."""
+    writer = None
+    try:
+        for chunk in chunks:
+            table = _arrow_table(chunk, writer.schema if writer is not None else None)
+            if writer is None:
+                writer = pq.ParquetWriter(sink, table.schema)
+            writer.write_table(table)
+        if writer is None:
+            pq.write_table(pa.table({}), sink)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def write_xlsx(chunks, sink, sheet='Datos'):
+    """XLSX con el escritor de solo escritura de openpyxl: las filas no quedan en memoria.
+
+    Al llegar al límite de filas de una hoja se continúa en otra ('Datos 2', ...).
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet_ws, rows_in_sheet, header = None, 0, None
+    for chunk in chunks:
+        if header is None:
+            header = [str(c) for c in chunk.columns]
+        # Celdas vacías en vez de NaN/NaT, que openpyxl no sabe escribir
+        values = chunk.astype(object).where(chunk.notna(), None)
+        for row in values.itertuples(index=False, name=None):
+            if sheet_ws is None or rows_in_sheet >= EXCEL_MAX_ROWS:
+                n = len(workbook.worksheets) + 1
+                sheet_ws = workbook.create_sheet(sheet if n == 1 else f"{sheet} {n}")
+                sheet_ws.append(header)
+                rows_in_sheet = 0
+            sheet_ws.append(row)
+            rows_in_sheet += 1
+    if sheet_ws is None:
+        workbook.create_sheet(sheet).append(header or [])
+    workbook.save(sink)
+
+
+WRITERS = {'csv': write_csv, 'parquet': write_parquet, 'xlsx': write_xlsx}
+
+
+def export_file(chunks, fmt, directory=None):
+    """Escribe los bloques en un archivo temporal de formato `fmt`; devuelve su ruta.
+
+    El archivo no se borra solo: quien lo pide decide cuándo.
+    """
+    with tempfile.NamedTemporaryFile(suffix=f'.{fmt}', prefix='conaltura-export-', dir=directory, delete=False) as sink:
+        WRITERS[fmt](chunks, sink)
+        return sink.name
+
+
+def frame_chunks(df, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Una tabla ya calculada, en bloques."""
+    for start in range(0, max(len(df), 1), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+class ExportFile:
+    """Un archivo exportado que se borra cuando el objeto se destruye.
+
+    Guardado en `st.session_state`, dura lo que la sesión o hasta que se
+    reemplaza por otra exportación.
+    """
+
+    def __init__(self, path, key):
+        self.path = path
+        self.key = key
+        weakref.finalize(self, _remove, path)
+
+
+def _remove(path):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
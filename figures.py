@@ -0,0 +1,302 @@
+"""
+Construcción de las figuras Plotly del dashboard a partir de DashboardStats.
+
+Lo que comparten todas las figuras (fondos, ejes, colores) está en la
+plantilla 'conaltura'; cada figura solo trae su tamaño, márgenes y datos,
+redondeados a la precisión con que se muestran.
+"""
+
+import math
+from functools import partial
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+from plotly.subplots import make_subplots
+
+from aggregates import TIME_GRANULARITIES
+from formatting import format_int_array, format_num, format_short, format_short_array
+from theme import AGRUPACION_COLORS, CIUDAD_COLORS, CORAL, CYAN, GOLD, LILAC, TEAL, get_color
+
+# Cifras significativas de los valores que viajan al navegador; las etiquetas muestran tres
+SIGNIFICANT_DIGITS = 4
+
+GRID_COLOR = 'rgba(0,0,0,0.05)'
+
+pio.templates['conaltura'] = go.layout.Template(layout=dict(
+    paper_bgcolor='rgba(0,0,0,0)',
+    plot_bgcolor='rgba(0,0,0,0)',
+    colorway=[TEAL, CORAL, LILAC, CYAN, GOLD],
+    xaxis=dict(showgrid=False, zeroline=False, gridcolor=GRID_COLOR),
+    yaxis=dict(showgrid=False, zeroline=False, gridcolor=GRID_COLOR),
+))
+
+
+def compact(values, digits=SIGNIFICANT_DIGITS):
+    """Valores como lista JSON corta: `digits` cifras significativas, enteros sin '.0' y NaN como null."""
+    out = []
+    for value in np.asarray(values, dtype='float64').tolist():
+        if math.isnan(value):
+            out.append(None)
+            continue
+        if value != 0:
+            value = round(value, digits - 1 - math.floor(math.log10(abs(value))))
+        out.append(int(value) if value.is_integer() else value)
+    return out
+
+
+def counts(values):
+    """Unidades como enteros, truncadas igual que sus etiquetas (las de una muestra son estimaciones)."""
+    return np.trunc(np.asarray(values, dtype='float64')).astype('int64').tolist()
+
+
+def error_bars(data, column):
+    """Barras de error con el margen del 95 % si `data` viene de una muestra; None si es exacto."""
+    if column not in data.columns:
+        return None
+    return dict(type='data', array=compact(data[column], 2), color='#64748B', thickness=1.5, width=4)
+
+
+def city_ranking(stats):
+    """Ventas y unidades por ciudad, en barras horizontales paralelas."""
+    city_data = stats.by('Ciudad').sort_values('Valor Neto', ascending=True)
+
+    colors_ventas = [get_color(c, CIUDAD_COLORS) for c in city_data['Ciudad']]
+
+    fig = make_subplots(rows=1, cols=2, shared_yaxes=True,
+                       subplot_titles=('Ventas ($)', 'Unidades (#)'),
+                       horizontal_spacing=0.02)
+
+    fig.add_trace(go.Bar(
+        y=city_data['Ciudad'].tolist(),
+        x=compact(city_data['Valor Neto']),
+        error_x=error_bars(city_data, 'Margen Ventas'),
+        orientation='h',
+        marker_color=colors_ventas,
+        text=format_short_array(city_data['Valor Neto']),
+        textposition='outside',
+        showlegend=False
+    ), row=1, col=1)
+
+    fig.add_trace(go.Bar(
+        y=city_data['Ciudad'].tolist(),
+        x=counts(city_data['Unidades']),
+        error_x=error_bars(city_data, 'Margen Unidades'),
+        orientation='h',
+        marker_color='rgba(18,81,96,0.5)',
+        texttemplate='%{x:d}',
+        textposition='outside',
+        showlegend=False
+    ), row=1, col=2)
+
+    fig.update_layout(height=300, margin=dict(l=0, r=50, t=30, b=10))
+    fig.update_xaxes(showticklabels=False)
+    return fig
+
+
+MESES = ['Ene', 'Feb', 'Mar', 'Abr', 'May', 'Jun', 'Jul', 'Ago', 'Sep', 'Oct', 'Nov', 'Dic']
+
+# Frecuencia de pandas con la que empieza cada periodo de TIME_GRANULARITIES
+PERIOD_FREQ = {'Día': 'D', 'Semana': 'W-MON', 'Mes': 'MS', 'Trimestre': 'QS'}
+
+
+def period_labels(periods, granularity):
+    """Etiquetas en español con el año: '05 Ene 2025', 'Ene 2025', 'T1 2025'."""
+    year = periods.year.astype(str)
+    month = pd.Index(MESES).take(periods.month - 1)
+    if granularity == 'Mes':
+        return (month + ' ' + year).tolist()
+    if granularity == 'Trimestre':
+        return ('T' + periods.quarter.astype(str) + ' ' + year).tolist()
+    return (periods.strftime('%d') + ' ' + month + ' ' + year).tolist()
+
+
+def timeline(stats, granularity='Mes'):
+    """Ventas y unidades por día, semana, mes o trimestre, en doble eje.
+
+    Los periodos sin ventas dentro del rango aparecen en cero.
+    """
+    data = stats.timeline(granularity).set_index(granularity)[['Valor Neto', 'Unidades']]
+    if len(data):
+        periods = pd.date_range(data.index.min(), data.index.max(), freq=PERIOD_FREQ[granularity])
+        data = data.reindex(periods, fill_value=0)
+    labels = period_labels(pd.DatetimeIndex(data.index), granularity)
+    ventas = data['Valor Neto']
+    uds = data['Unidades']
+
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
+
+    fig.add_trace(go.Scatter(
+        x=labels,
+        y=compact(ventas),
+        mode='lines+markers',
+        fill='tozeroy',
+        name='Ventas ($)',
+        line=dict(color=CORAL, width=3),
+        fillcolor='rgba(255, 121, 90, 0.2)',
+        marker=dict(size=8, color=CORAL)
+    ), secondary_y=False)
+
+    fig.add_trace(go.Scatter(
+        x=labels,
+        y=counts(uds),
+        mode='lines+markers',
+        name='Unidades (#)',
+        line=dict(color=TEAL, width=3, dash='dot'),
+        marker=dict(size=8, color=TEAL, symbol='square')
+    ), secondary_y=True)
+
+    fig.update_layout(
+        height=300,
+        margin=dict(l=0, r=0, t=10, b=10),
+        legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='center', x=0.5),
+    )
+    fig.update_yaxes(showgrid=True, tickformat='$.2s', secondary_y=False)
+    return fig
+
+
+def agrupacion_sales_share(stats):
+    """Participación de cada agrupación en las ventas."""
+    agrup_data = stats.by('Agrupación').sort_values('Valor Neto', ascending=False)
+    colors = [get_color(a, AGRUPACION_COLORS) for a in agrup_data['Agrupación']]
+
+    fig = go.Figure(go.Pie(
+        labels=agrup_data['Agrupación'].tolist(),
+        values=compact(agrup_data['Valor Neto']),
+        hole=0.55,
+        marker=dict(colors=colors),
+        textinfo='percent+label',
+        textposition='outside',
+        textfont=dict(size=10)
+    ))
+    fig.add_annotation(
+        text=f"<b>VENTAS</b><br>{format_short(agrup_data['Valor Neto'].sum())}", 
+        x=0.5, y=0.5, font=dict(size=14, color=TEAL), showarrow=False
+    )
+    fig.update_layout(
+        title='Participación en Ventas ($)',
+        height=350,
+        margin=dict(l=20, r=20, t=50, b=20),
+        showlegend=False,
+    )
+    return fig
+
+
+def agrupacion_units_share(stats):
+    """Participación de cada agrupación en las unidades."""
+    agrup_data = stats.by('Agrupación').sort_values('Valor Neto', ascending=False)
+    colors = [get_color(a, AGRUPACION_COLORS) for a in agrup_data['Agrupación']]
+
+    fig = go.Figure(go.Pie(
+        labels=agrup_data['Agrupación'].tolist(),
+        values=counts(agrup_data['Unidades']),
+        hole=0.55,
+        marker=dict(colors=colors),
+        textinfo='percent+label',
+        textposition='outside',
+        textfont=dict(size=10)
+    ))
+    fig.add_annotation(
+        text=f"<b>UNIDADES</b><br>{format_num(agrup_data['Unidades'].sum())}", 
+        x=0.5, y=0.5, font=dict(size=14, color=TEAL), showarrow=False
+    )
+    fig.update_layout(
+        title='Participación en Unidades (#)',
+        height=350,
+        margin=dict(l=20, r=20, t=50, b=20),
+        showlegend=False,
+    )
+    return fig
+
+
+def agrupacion_ticket(stats):
+    """Ticket promedio por agrupación."""
+    agrup_data = stats.by('Agrupación').sort_values('Valor Neto', ascending=False)
+    agrup_sorted = agrup_data.sort_values('Ticket', ascending=True)
+    colors_sorted = [get_color(a, AGRUPACION_COLORS) for a in agrup_sorted['Agrupación']]
+
+    fig = go.Figure(go.Bar(
+        y=agrup_sorted['Agrupación'].tolist(),
+        x=compact(agrup_sorted['Ticket']),
+        orientation='h',
+        marker_color=colors_sorted,
+        text=format_short_array(agrup_sorted['Ticket']) + ' (' + format_int_array(agrup_sorted['Unidades']) + ' uds)',
+        textposition='outside'
+    ))
+
+    fig.update_layout(
+        height=400,
+        margin=dict(l=0, r=150, t=10, b=10),
+        xaxis=dict(showgrid=True, tickformat='$.2s'),
+    )
+    return fig
+
+
+def top_projects_sales(stats):
+    """Top 15 proyectos por ventas."""
+    proy_data = stats.projects()
+    top15 = proy_data.head(15).sort_values('Valor Neto', ascending=True)
+
+    fig = go.Figure(go.Bar(
+        y=[p.strip() for p in top15['MacroProyecto']],
+        x=compact(top15['Valor Neto']),
+        error_x=error_bars(top15, 'Margen Ventas'),
+        orientation='h',
+        marker_color=CORAL,
+        text=format_short_array(top15['Valor Neto']) + ' • ' + format_int_array(top15['Unidades']) + ' uds',
+        textposition='outside'
+    ))
+
+    fig.update_layout(
+        height=500,
+        margin=dict(l=0, r=120, t=10, b=10),
+        xaxis=dict(showticklabels=False),
+    )
+    return fig
+
+
+def top_projects_units(stats):
+    """Top 15 proyectos por unidades vendidas."""
+    proy_data = stats.projects()
+    proy_uds = proy_data.sort_values('Unidades', ascending=False).head(15)
+
+    fig = go.Figure(go.Bar(
+        x=[p.strip() for p in proy_uds['MacroProyecto']],
+        y=counts(proy_uds['Unidades']),
+        error_y=error_bars(proy_uds, 'Margen Unidades'),
+        marker_color=TEAL,
+        texttemplate='%{y:d}',
+        textposition='outside'
+    ))
+
+    fig.update_layout(
+        height=350,
+        margin=dict(l=0, r=0, t=20, b=80),
+        xaxis=dict(tickangle=-35),
+        yaxis=dict(showgrid=True, title='Unidades'),
+    )
+    return fig
+
+
+FIGURES = {
+    'city_ranking': city_ranking,
+    **{f'timeline:{g}': partial(timeline, granularity=g) for g in TIME_GRANULARITIES},
+    'agrupacion_sales_share': agrupacion_sales_share,
+    'agrupacion_units_share': agrupacion_units_share,
+    'agrupacion_ticket': agrupacion_ticket,
+    'top_projects_sales': top_projects_sales,
+    'top_projects_units': top_projects_units,
+}
+
+
+def build_figure(fig_id, stats):
+    fig = FIGURES[fig_id](stats)
+    # Reemplaza la plantilla por defecto de Plotly (o la de Streamlit), que viaja completa en cada figura
+    fig.update_layout(template='conaltura')
+    return fig
+
+
+def figure_nbytes(fig):
+    """Tamaño del spec JSON que recibe el navegador."""
+    return len(pio.to_json(fig, validate=False))
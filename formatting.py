@@ -0,0 +1,163 @@
+"""
+Formato de cifras en convención colombiana (punto como separador de miles).
+"""
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+
+def format_cop(value):
+    if pd.isna(value) or value == 0:
+        return "$0"
+    return f"${value:,.0f}".replace(",", ".")
+
+def format_short(value):
+    if pd.isna(value) or value == 0:
+        return "$0"
+    abs_val = abs(value)
+    if abs_val >= 1_000_000_000_000:
+        return f"${value/1_000_000_000_000:.2f}B"
+    elif abs_val >= 1_000_000_000:
+        return f"${value/1_000_000_000:.1f}MM"
+    elif abs_val >= 1_000_000:
+        return f"${value/1_000_000:.0f}M"
+    elif abs_val >= 1_000:
+        return f"${value/1_000:.0f}K"
+    return f"${value:.0f}"
+
+def format_num(value):
+    if pd.isna(value) or value == 0:
+        return "0"
+    return f"{int(value):,}".replace(",", ".")
+
+
+
+# Versiones vectoriales: reciben una Series o un ndarray y devuelven todas las
+# etiquetas de una vez (Series con el mismo índice, o ndarray de str). El texto
+# se arma con kernels de Arrow y es idéntico al de las funciones escalares.
+
+# Con menos valores que esto (las etiquetas de una gráfica o de las tarjetas)
+# armar los kernels de Arrow cuesta más que llamar a la función escalar por valor
+VECTOR_MIN_VALUES = 1000
+
+# (umbral, divisor, decimales, sufijo), igual que las ramas de format_short
+_SHORT_TIERS = [
+    (1_000_000_000_000, 1_000_000_000_000, 2, 'B'),
+    (1_000_000_000, 1_000_000_000, 1, 'MM'),
+    (1_000_000, 1_000_000, 0, 'M'),
+    (1_000, 1_000, 0, 'K'),
+    (0, 1, 0, ''),
+]
+
+
+def _as_float_array(values):
+    return np.asarray(values, dtype='float64')
+
+
+def _scalar_labels(values, arr, scalar):
+    return _like(values, np.array([scalar(v) for v in arr.tolist()], dtype=object))
+
+
+def _like(values, labels):
+    labels = labels.to_numpy(zero_copy_only=False) if isinstance(labels, pa.Array) else labels
+    if isinstance(values, pd.Series):
+        return pd.Series(labels, index=values.index, name=values.name)
+    return labels
+
+
+def _digits(ints):
+    return pc.cast(pa.array(ints, type=pa.int64()), pa.string())
+
+
+def _signed(text, negative):
+    return pc.if_else(pa.array(negative), pc.binary_join_element_wise('-', text, ''), text)
+
+
+def _rounded(values, decimals):
+    """|values| redondeado a `decimals` decimales, en unidades enteras.
+
+    También marca los empates (x.5): ahí printf redondea según el valor
+    binario exacto y el resultado puede diferir de np.rint.
+    """
+    scaled = np.abs(values) * 10 ** decimals
+    ties = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    return np.rint(scaled).astype(np.int64), ties
+
+
+def _group_thousands(magnitude, negative):
+    """Enteros con punto como separador de miles; `negative` pone el signo."""
+    def group(rest):
+        # Un grupo lleva ceros a la izquierda solo si hay otro grupo antes
+        text = _digits(rest % 1000)
+        return pc.if_else(pa.array(rest >= 1000), pc.utf8_lpad(text, 3, '0'), text)
+
+    out = group(magnitude)
+    rest = magnitude // 1000
+    while (rest > 0).any():
+        joined = pc.binary_join_element_wise(group(rest), out, '.')
+        out = pc.if_else(pa.array(rest > 0), joined, out)
+        rest = rest // 1000
+    return _signed(out, negative)
+
+
+def _fixed(values, decimals):
+    """Como `'%.Nf' % v` (N = `decimals`), salvo en los empates que también devuelve."""
+    units, ties = _rounded(values, decimals)
+    if decimals:
+        scale = 10 ** decimals
+        frac = pc.utf8_lpad(_digits(units % scale), decimals, '0')
+        text = pc.binary_join_element_wise(_digits(units // scale), frac, '.')
+    else:
+        text = _digits(units)
+    return _signed(text, values < 0), ties
+
+
+def _fix_ties(labels, arr, ties, scalar):
+    if ties.any():
+        labels[ties] = [scalar(v) for v in arr[ties].tolist()]
+    return labels
+
+
+def format_short_array(values):
+    arr = _as_float_array(values)
+    if len(arr) < VECTOR_MIN_VALUES:
+        return _scalar_labels(values, arr, format_short)
+    zero = np.isnan(arr) | (arr == 0)
+    abs_val = np.abs(arr)
+    labels = np.full(arr.shape, '$0', dtype=object)
+    ties = np.zeros(arr.shape, dtype=bool)
+    pending = ~zero
+    for threshold, divisor, decimals, suffix in _SHORT_TIERS:
+        tier = pending & (abs_val >= threshold)
+        if tier.any():
+            number, tier_ties = _fixed(arr[tier] / divisor, decimals)
+            labels[tier] = pc.binary_join_element_wise('$', number, suffix, '').to_numpy(zero_copy_only=False)
+            ties[tier] = tier_ties
+        pending &= ~tier
+    return _like(values, _fix_ties(labels, arr, ties, format_short))
+
+
+def format_cop_array(values):
+    if len(values) < VECTOR_MIN_VALUES:
+        return _scalar_labels(values, _as_float_array(values), format_cop)
+    arr = np.nan_to_num(_as_float_array(values), nan=0.0)
+    units, ties = _rounded(arr, 0)
+    text = pc.binary_join_element_wise('$', _group_thousands(units, arr < 0), '')
+    labels = pc.if_else(pa.array(arr == 0), '$0', text).to_numpy(zero_copy_only=False)
+    return _like(values, _fix_ties(labels, arr, ties & (arr != 0), format_cop))
+
+
+def format_num_array(values):
+    if len(values) < VECTOR_MIN_VALUES:
+        return _scalar_labels(values, _as_float_array(values), format_num)
+    arr = np.nan_to_num(_as_float_array(values), nan=0.0)
+    ints = np.trunc(arr).astype(np.int64)
+    labels = pc.if_else(pa.array(arr == 0), '0', _group_thousands(np.abs(ints), ints < 0))
+    return _like(values, labels)
+
+
+def format_int_array(values):
+    """Equivalente vectorial de `str(int(v))`."""
+    return _like(values, _digits(np.trunc(_as_float_array(values)).astype(np.int64)))
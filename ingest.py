@@ -0,0 +1,366 @@
+"""
+Ingesta de la sabana de datos: lectura, limpieza y caché por contenido.
+"""
+
+import codecs
+import hashlib
+import io
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+DIMENSIONS = ['MacroProyecto', 'Medio Publicitario', 'Ciudad', 'Agrupación']
+REQUIRED_COLUMNS = ['MacroProyecto', 'Valor Neto', 'Ciudad', 'Agrupación']
+
+# Tipos que garantiza la ingesta para las columnas que usa el dashboard
+# ('Fecha' queda como datetime64 tras pd.to_datetime; 'Día' es la fecha sin hora)
+SCHEMA = {
+    'Día': 'datetime64[ns]',
+    'Valor Neto': 'float64',
+    **{col: 'category' for col in DIMENSIONS},
+}
+
+# Columnas que se leen de un Excel; el resto de la hoja ni se convierte
+USED_COLUMNS = ['Fecha', 'Valor Neto', 'MacroProyecto', 'Ciudad', 'Agrupación', 'Medio Publicitario']
+
+# Subir cuando cambie la limpieza o los tipos: invalida los snapshots en disco
+SCHEMA_VERSION = 4
+
+# Tope de los snapshots en disco: al superarlo se borran primero los de uso más antiguo
+SNAPSHOT_MAX_BYTES = 5 * 1024**3
+
+# Un snapshot que no se usa en este tiempo se borra
+SNAPSHOT_MAX_AGE_S = 30 * 24 * 3600
+
+# Prefijo que se examina para detectar codificación y separador de un CSV
+SNIFF_BYTES = 64 * 1024
+
+CSV_SEPARATORS = [';', ',', '\t', '|']
+
+# Filas por bloque en la ingesta por streaming
+CSV_CHUNK_ROWS = 200_000
+
+# Libros desde este tamaño leen sus hojas en paralelo, un proceso por hoja
+PARALLEL_EXCEL_MIN_BYTES = 2 * 1024**2
+
+
+def content_hash(content):
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+
+def selection_hash(digest, sheets):
+    """Identifica un archivo junto con las hojas elegidas; sin hojas, el hash del archivo."""
+    if not sheets:
+        return digest
+    return content_hash('\0'.join([digest, *sheets]).encode())
+
+
+def frame_nbytes(df):
+    return int(df.memory_usage(deep=True).sum())
+
+
+def sniff_csv(prefix):
+    """Codificación y separador de un CSV a partir de sus primeros bytes.
+
+    Las exportaciones del CRM llegan en UTF-8 (a veces con BOM) o en latin-1.
+    """
+    if prefix.startswith(codecs.BOM_UTF8):
+        encoding = 'utf-8-sig'
+    else:
+        try:
+            # final=False: un carácter cortado al final del prefijo no es un error
+            codecs.getincrementaldecoder('utf-8')().decode(prefix, final=False)
+            encoding = 'utf-8'
+        except UnicodeDecodeError:
+            encoding = 'latin-1'
+    header = (prefix.decode(encoding, errors='ignore').splitlines() or [''])[0]
+    # El separador es el candidato que más aparece en la fila de encabezados
+    sep = max(CSV_SEPARATORS, key=header.count) if any(c in header for c in CSV_SEPARATORS) else ','
+    return encoding, sep
+
+
+def excel_engine():
+    # calamine (Rust) lee varias veces más rápido que openpyxl; es opcional
+    try:
+        import python_calamine  # noqa: F401
+    except ImportError:
+        return None
+    return 'calamine'
+
+
+def _is_used_column(name):
+    return str(name).strip() in USED_COLUMNS
+
+
+def excel_sheets(content):
+    """Hojas del libro y si cada una trae las columnas obligatorias ({hoja: bool})."""
+    headers = pd.read_excel(io.BytesIO(content), sheet_name=None, nrows=0, engine=excel_engine())
+    return {
+        str(name): all(c in df.columns.astype(str).str.strip() for c in REQUIRED_COLUMNS)
+        for name, df in headers.items()
+    }
+
+
+def _read_sheet(content, sheet, engine):
+    df = pd.read_excel(io.BytesIO(content), sheet_name=sheet, engine=engine, usecols=_is_used_column)
+    df.columns = df.columns.astype(str).str.strip()
+    return df
+
+
+def read_excel_sheets(content, sheets=None):
+    """Lee y une las hojas elegidas (por defecto la primera), solo con `USED_COLUMNS`.
+
+    En libros grandes cada hoja se lee en su propio proceso.
+    """
+    sheets = list(sheets) if sheets else [0]
+    engine = excel_engine()
+    workers = min(len(sheets), os.cpu_count() or 1)
+    if workers > 1 and len(content) >= PARALLEL_EXCEL_MIN_BYTES:
+        # spawn: el servidor tiene hilos y un fork podría heredar locks tomados
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            frames = list(pool.map(_read_sheet, repeat(content), sheets, repeat(engine)))
+    else:
+        frames = [_read_sheet(content, sheet, engine) for sheet in sheets]
+    for sheet, df in zip(sheets, frames):
+        missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+        if missing and len(sheets) > 1:
+            raise ValueError(f"Faltan columnas en la hoja '{sheet}': {missing}")
+    return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+
+def read_sabana(content, filename, sheets=None):
+    if filename.endswith('.csv'):
+        encoding, sep = sniff_csv(content[:SNIFF_BYTES])
+        return pd.read_csv(io.BytesIO(content), sep=sep, encoding=encoding)
+    return read_excel_sheets(content, sheets)
+
+
+def read_csv_rows(content, start=0):
+    """Filas limpias de un CSV desde el byte `start` (inicio de una línea), con los encabezados del archivo.
+
+    Codificación y separador se detectan sobre el inicio del archivo, no
+    sobre el tramo leído.
+    """
+    encoding, sep = sniff_csv(content[:SNIFF_BYTES])
+    if start:
+        content = content[:content.index(b'\n') + 1] + content[start:]
+    return clean_sabana(pd.read_csv(io.BytesIO(content), sep=sep, encoding=encoding))
+
+
+def csv_line_starts(content, block=64 * 1024**2):
+    """Posición del inicio de cada fila de datos (sin la de encabezados), buscando saltos de línea por bloques."""
+    data = np.frombuffer(content, dtype=np.uint8)
+    starts = np.concatenate(
+        [np.flatnonzero(data[i:i + block] == 10) + i + 1 for i in range(0, len(data), block)] or [np.empty(0, np.int64)]
+    )
+    return starts[starts < len(content)]
+
+
+def sample_csv(content, rows, seed=0):
+    """Muestra aleatoria simple de `rows` filas de un CSV, sin parsear el resto.
+
+    Devuelve (filas limpias, filas de datos del archivo). Supone, como las
+    exportaciones del CRM, que ningún campo trae saltos de línea.
+    """
+    starts = csv_line_starts(content)
+    population = len(starts)
+    if population == 0:
+        return clean_sabana(read_sabana(content, 'muestra.csv')), 0
+    picked = np.sort(np.random.default_rng(seed).choice(population, min(rows, population), replace=False))
+    ends = np.append(starts[1:], len(content))
+    lines = [content[start:end] for start, end in zip(starts[picked], ends[picked])]
+    body = b''.join(line if line.endswith(b'\n') else line + b'\n' for line in lines)
+    encoding, sep = sniff_csv(content[:SNIFF_BYTES])
+    df = pd.read_csv(io.BytesIO(content[:starts[0]] + body), sep=sep, encoding=encoding)
+    return clean_sabana(df), population
+
+
+def row_hashes(df, columns=USED_COLUMNS):
+    """Hash de 64 bits de cada fila sobre `columns`: la misma venta da el mismo hash en cada exportación."""
+    cols = [c for c in columns if c in df.columns]
+    return pd.util.hash_pandas_object(df[cols], index=False).to_numpy()
+
+
+def iter_csv_chunks(source, chunk_rows=CSV_CHUNK_ROWS):
+    """Lee un CSV (objeto binario con seek) en bloques ya limpios.
+
+    Solo hay un bloque en memoria a la vez; el archivo no se decodifica completo.
+    """
+    prefix = source.read(SNIFF_BYTES)
+    source.seek(0)
+    encoding, sep = sniff_csv(prefix)
+    with pd.read_csv(source, sep=sep, encoding=encoding, chunksize=chunk_rows) as reader:
+        for chunk in reader:
+            chunk = clean_sabana(chunk)
+            missing = [c for c in REQUIRED_COLUMNS if c not in chunk.columns]
+            if missing:
+                raise ValueError(f"Faltan columnas: {missing}")
+            yield chunk
+
+
+def _to_dimension(values):
+    # Se limpia cada valor distinto una sola vez y no cada fila
+    raw = values.fillna('Sin Definir').astype('category')
+    labels = raw.cat.categories.astype(str).str.strip()
+    remap, categories = pd.factorize(labels, sort=True)
+    return pd.Categorical.from_codes(remap[raw.cat.codes], categories=categories)
+
+
+def clean_sabana(df):
+    """Normaliza nombres de columnas y aplica los tipos de `SCHEMA`."""
+    df.columns = df.columns.str.strip()
+
+    if 'Fecha' in df.columns:
+        df['Fecha'] = pd.to_datetime(df['Fecha'], errors='coerce')
+        df['Día'] = df['Fecha'].dt.normalize().astype(SCHEMA['Día'])
+
+    if 'Valor Neto' in df.columns:
+        df['Valor Neto'] = (
+            pd.to_numeric(df['Valor Neto'], errors='coerce').fillna(0).astype(SCHEMA['Valor Neto'])
+        )
+
+    for col in DIMENSIONS:
+        if col in df.columns:
+            df[col] = _to_dimension(df[col])
+
+    return df
+
+
+def concat_chunks(chunks):
+    """Une bloques ya limpios en una sola sabana con los tipos de `SCHEMA`.
+
+    Los bloques traen categorías distintas; al unirlos las dimensiones se
+    vuelven a convertir en categóricas (ordenadas, como en `clean_sabana`).
+    """
+    df = pd.concat(chunks, ignore_index=True)
+    for col in DIMENSIONS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    return df
+
+
+def schema_report(df):
+    """Tipo y memoria por columna de una sabana ya cargada."""
+    memory = df.memory_usage(deep=True, index=False)
+    return pd.DataFrame({
+        'Columna': df.columns,
+        'Tipo': df.dtypes.astype(str).values,
+        'Memoria (MB)': (memory.values / 1024**2).round(2),
+    })
+
+
+def snapshot_path(snapshot_dir, digest):
+    return Path(snapshot_dir) / f"{digest}-v{SCHEMA_VERSION}.arrow"
+
+
+def _arrow_safe(df):
+    # Columnas extra con tipos mezclados (p. ej. números y texto) se guardan como texto
+    df = df.copy()
+    for col in df.columns:
+        if df[col].dtype == object:
+            try:
+                pa.array(df[col], from_pandas=True)
+            except pa.ArrowException:
+                df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    return df
+
+
+def write_snapshot(df, snapshot_dir, digest):
+    """Guarda la sabana limpia como Arrow IPC sin comprimir, apta para memory-map."""
+    path = snapshot_path(snapshot_dir, digest)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    table = pa.Table.from_pandas(_arrow_safe(df), preserve_index=False)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    prune_snapshots(snapshot_dir)
+    return path
+
+
+def read_snapshot(snapshot_dir, digest):
+    path = snapshot_path(snapshot_dir, digest)
+    if not path.exists():
+        return None
+    try:
+        os.utime(path)  # la fecha de modificación marca el último uso
+    except OSError:
+        pass
+    with pa.memory_map(str(path)) as source:
+        return pa.ipc.open_file(source).read_all().to_pandas()
+
+
+def prune_snapshots(snapshot_dir, max_bytes=SNAPSHOT_MAX_BYTES, max_age=SNAPSHOT_MAX_AGE_S):
+    """Borra los snapshots de otra versión del esquema, los que no se usan hace más de
+    `max_age` segundos y, si aún se pasa de `max_bytes`, los de uso más antiguo.
+
+    Devuelve los bytes liberados.
+    """
+    directory = Path(snapshot_dir)
+    if not directory.is_dir():
+        return 0
+    current = f"-v{SCHEMA_VERSION}.arrow"
+    now = time.time()
+    stale, kept = [], []
+    for path in directory.glob('*.arrow'):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue  # otro proceso lo acaba de borrar
+        if not path.name.endswith(current) or now - stat.st_mtime > max_age:
+            stale.append((path, stat.st_size))
+        else:
+            kept.append((stat.st_mtime, path, stat.st_size))
+    total = sum(size for _, _, size in kept)
+    for _, path, size in sorted(kept):
+        if total <= max_bytes:
+            break
+        stale.append((path, size))
+        total -= size
+    freed = 0
+    for path, size in stale:
+        try:
+            path.unlink()
+            freed += size
+        except OSError:
+            pass
+    return freed
+
+
+def load_sabana(content, filename, snapshot_dir=None, digest=None, sheets=None):
+    """Lee y limpia la sabana.
+
+    Con `snapshot_dir`, el resultado limpio se persiste en disco por hash de
+    contenido y versión de esquema, y sobrevive a reinicios del servidor.
+    `sheets` son las hojas a unir de un Excel y forman parte de la clave.
+    El DataFrame devuelto se comparte entre reruns y sesiones: no se debe mutar.
+    """
+    if snapshot_dir is not None:
+        digest = selection_hash(digest or content_hash(content), sheets)
+        try:
+            df = read_snapshot(snapshot_dir, digest)
+        except (OSError, pa.ArrowException):
+            df = None
+        if df is not None:
+            return df
+
+    df = clean_sabana(read_sabana(content, filename, sheets))
+
+    if snapshot_dir is not None:
+        try:
+            write_snapshot(df, snapshot_dir, digest)
+        except (OSError, pa.ArrowException):
+            pass
+    return df
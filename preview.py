@@ -0,0 +1,97 @@
+"""
+Vista previa por muestra: KPIs, rankings y participaciones estimados con
+una muestra aleatoria de filas mientras se calcula el resultado exacto.
+"""
+
+import numpy as np
+import pandas as pd
+
+from aggregates import (
+    DATE_DIMENSION, TIME_GRANULARITIES, DashboardStats, build_cube, daily_totals, period_start,
+)
+from dataset import Dataset
+
+# Filas de la muestra: el error relativo de un total baja con su raíz cuadrada
+PREVIEW_SAMPLE_ROWS = 20_000
+
+# Cuantil normal del intervalo de confianza del 95 %
+Z95 = 1.96
+
+
+def _select(sample, filters):
+    mask = np.ones(len(sample), dtype=bool)
+    for dim, values in filters.items():
+        if not values or dim not in sample.columns:
+            continue
+        if dim == DATE_DIMENSION:
+            mask &= sample[dim].between(pd.Timestamp(values[0]), pd.Timestamp(values[1])).to_numpy()
+        else:
+            mask &= sample[dim].isin(values).to_numpy()
+    return sample[mask]
+
+
+class SampleStats(DashboardStats):
+    """DashboardStats estimado con una muestra aleatoria simple de `population` filas.
+
+    Ventas y unidades se escalan a la población; participaciones, tickets y
+    rankings salen de la muestra tal cual. `margin_ventas` y `margin_unidades`
+    son el semiancho del intervalo del 95 % de los totales, y `by` agrega las
+    columnas 'Margen Ventas' y 'Margen Unidades' por grupo (por periodo en
+    las granularidades de tiempo, que la muestra agrupa desde 'Día').
+    """
+
+    def __init__(self, sample, population, filters, key=None):
+        self.sample_rows = len(sample)
+        self.population = max(population, self.sample_rows)
+        self._selected = _select(sample, filters)
+        scale = self.population / max(self.sample_rows, 1)
+        cube = build_cube(self._selected)
+        cube['Valor Neto'] *= scale
+        cube['Unidades'] = cube['Unidades'] * scale
+        days = None
+        if DATE_DIMENSION in self._selected.columns:
+            days = lambda: self._scaled_days(scale)
+        super().__init__(cube, key, days=days)
+        ventas = self._selected['Valor Neto']
+        self.margin_ventas = float(self._margin(ventas.sum(), (ventas ** 2).sum()))
+        self.margin_unidades = float(self._margin(len(ventas), len(ventas)))
+
+    def _margin(self, total, sum_squares):
+        # Total de y·1[grupo] sobre la muestra: varianza con corrección por población finita
+        n, N = max(self.sample_rows, 1), self.population
+        variance = (sum_squares - total ** 2 / n) / max(n - 1, 1)
+        return Z95 * N * np.sqrt(np.maximum(variance, 0) / n * (1 - n / N))
+
+    def _scaled_days(self, scale):
+        daily = daily_totals(self._selected[DATE_DIMENSION], self._selected['Valor Neto'])
+        daily['Valor Neto'] *= scale
+        daily['Unidades'] = daily['Unidades'] * scale
+        return daily
+
+    def by(self, dim):
+        data = super().by(dim)
+        if 'Margen Ventas' not in data.columns:
+            ventas = self._selected['Valor Neto']
+            if dim in TIME_GRANULARITIES:
+                groups = period_start(self._selected[DATE_DIMENSION], dim).rename(dim)
+            else:
+                groups = self._selected[dim]
+            sums = ventas.groupby(groups, observed=True).sum()
+            squares = (ventas ** 2).groupby(groups, observed=True).sum()
+            counts = ventas.groupby(groups, observed=True).size()
+            data['Margen Ventas'] = self._margin(sums, squares).reindex(data[dim]).to_numpy()
+            data['Margen Unidades'] = self._margin(counts, counts).reindex(data[dim]).to_numpy()
+        return data
+
+
+class SampleDataset(Dataset):
+    """Dataset de una muestra: filtros y opciones salen de ella, `stats` devuelve estimaciones.
+
+    `n_rows` es el total de filas de la sabana, no el de la muestra.
+    """
+
+    def __init__(self, dataset_id, sample, population):
+        super().__init__(dataset_id, None, population, list(sample.columns), frame=sample)
+
+    def stats(self, filters):
+        return SampleStats(self.frame, self.n_rows, filters, key=self.stats_key(filters))
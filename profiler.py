@@ -0,0 +1,144 @@
+"""
+Instrumentación opcional: tiempo y memoria de cada etapa de un rerun.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+PERCENTILES = (50, 90, 99)
+
+# Un solo escritor a la vez en el archivo compartido por todas las sesiones
+_log_lock = threading.Lock()
+
+
+def rss_bytes():
+    """Memoria residente del proceso; None si el sistema no la expone."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss
+
+
+def _delta_mb(before, after):
+    if before is None or after is None:
+        return None
+    return round((after - before) / 1024**2, 2)
+
+
+class Profiler:
+    """Etapas de los reruns de una sesión, con totales y percentiles.
+
+    Un rerun completo va de `begin()` a `end()`. Una etapa medida fuera de
+    ese intervalo (un fragmento que se ejecuta solo) cuenta como un rerun
+    propio. La memoria es la del proceso, compartida con las demás sesiones:
+    el delta de una etapa es orientativo.
+    """
+
+    def __init__(self, session=None, log_path=None, max_history=500):
+        self.session = session
+        self.log_path = Path(log_path) if log_path else None
+        self.history = deque(maxlen=max_history)
+        self._stages = None
+
+    def begin(self):
+        self._stages = []
+        self._figures = {}
+        self._start = time.perf_counter()
+        self._rss = rss_bytes()
+
+    @contextmanager
+    def stage(self, name):
+        own_run = self._stages is None
+        if own_run:
+            self.begin()
+        start, rss = time.perf_counter(), rss_bytes()
+        try:
+            yield
+        finally:
+            self._stages.append({
+                'etapa': name,
+                'segundos': time.perf_counter() - start,
+                'memoria_mb': _delta_mb(rss, rss_bytes()),
+            })
+            if own_run:
+                self.end('fragmento')
+
+    def end(self, kind='completo'):
+        if self._stages is None:
+            return
+        record = {
+            'ts': time.time(),
+            'sesion': self.session,
+            'tipo': kind,
+            'total_s': time.perf_counter() - self._start,
+            'memoria_mb': _delta_mb(self._rss, rss_bytes()),
+            'etapas': self._stages,
+            'figuras_bytes': self._figures,
+        }
+        self._stages = None
+        self.history.append(record)
+        if self.log_path is not None:
+            self._write(record)
+
+    def payload(self, fig_id, nbytes):
+        """Anota los bytes del spec JSON de una figura enviada en el rerun en curso."""
+        if self._stages is not None:
+            self._figures[fig_id] = nbytes
+
+    def _write(self, record):
+        try:
+            self.log_path.parent.mkdir(parents=True, exist_ok=True)
+            line = json.dumps(record, ensure_ascii=False)
+            with _log_lock, open(self.log_path, 'a', encoding='utf-8') as log:
+                log.write(line + '\n')
+        except OSError:
+            pass
+
+    @property
+    def last(self):
+        return self.history[-1] if self.history else None
+
+    def last_table(self):
+        """Etapas del último rerun en milisegundos."""
+        if self.last is None:
+            return pd.DataFrame(columns=['Etapa', 'ms', 'MB'])
+        stages = self.last['etapas']
+        return pd.DataFrame({
+            'Etapa': [s['etapa'] for s in stages],
+            'ms': [round(s['segundos'] * 1000, 1) for s in stages],
+            'MB': [s['memoria_mb'] for s in stages],
+        })
+
+    def last_figures_table(self):
+        """Figuras del último rerun con el tamaño (KB) de su spec JSON, de la más pesada a la más liviana."""
+        figures = self.last.get('figuras_bytes', {}) if self.last is not None else {}
+        data = pd.DataFrame({'Figura': list(figures), 'KB': [round(n / 1024, 1) for n in figures.values()]})
+        return data.sort_values('KB', ascending=False, ignore_index=True)
+
+    def percentiles(self):
+        """Percentiles (ms) de cada etapa y del total de los reruns completos de la sesión."""
+        samples = {}
+        for record in self.history:
+            for s in record['etapas']:
+                samples.setdefault(s['etapa'], []).append(s['segundos'])
+            if record['tipo'] == 'completo':
+                samples.setdefault('TOTAL', []).append(record['total_s'])
+        rows = []
+        for name, values in samples.items():
+            ms = np.percentile(np.array(values) * 1000, PERCENTILES)
+            rows.append({'Etapa': name, 'n': len(values), **{f"p{p}": round(v, 1) for p, v in zip(PERCENTILES, ms)}})
+        return pd.DataFrame(rows, columns=['Etapa', 'n', *(f"p{p}" for p in PERCENTILES)])
@@ -0,0 +1,161 @@
+"""
+Registro de datasets del servidor: una sola copia por contenido, compartida
+por todas las sesiones.
+"""
+
+import threading
+import time
+import weakref
+from collections import Counter
+
+from cache import LRUCache
+
+
+class DatasetRegistry:
+    """Datasets de solo lectura identificados por hash, con conteo de sesiones.
+
+    Cada archivo subido con el mismo nombre y distinto contenido es una versión
+    nueva. Un dataset que alguna sesión está viendo no se expulsa; los demás
+    salen por antigüedad cuando se superan `max_entries` o `max_bytes`.
+    """
+
+    def __init__(self, max_entries=8, max_bytes=None):
+        self._datasets = LRUCache(
+            max_entries, max_bytes, sizeof=lambda ds: ds.nbytes, can_evict=lambda key: self._refs[key] == 0
+        )
+        self._lock = threading.Lock()
+        self._refs = Counter()
+        self._info = {}
+        self._versions = Counter()
+        self._building = {}
+        self._jobs = {}
+
+    def get(self, dataset_id):
+        return self._datasets.get(dataset_id)
+
+    def get_or_load(self, dataset_id, name, build):
+        """El dataset registrado con `dataset_id`; si no existe, lo construye una sola vez.
+
+        Las sesiones que piden el mismo dataset mientras se construye esperan
+        ese resultado en vez de procesar el archivo otra vez.
+        """
+        dataset = self._datasets.get(dataset_id)
+        if dataset is not None:
+            return dataset
+        with self._lock:
+            building = self._building.setdefault(dataset_id, threading.Lock())
+        try:
+            with building:
+                dataset = self._datasets.get(dataset_id)
+                if dataset is None:
+                    dataset = build()
+                    self._register(dataset_id, name, dataset)
+                    self._datasets.put(dataset_id, dataset)
+        finally:
+            with self._lock:
+                self._building.pop(dataset_id, None)
+        return dataset
+
+    def get_or_start(self, dataset_id, name, start, retry=True):
+        """El dataset registrado o, si no existe, la ingesta en segundo plano que lo construye.
+
+        `start()` devuelve un IngestJob sin iniciar. Las sesiones que suben el
+        mismo archivo siguen una sola ingesta; al terminar bien, el dataset se
+        registra como con `get_or_load`. Una ingesta fallida se conserva para
+        que las sesiones que la seguían vean el error; con `retry` se descarta
+        y se empieza otra.
+        """
+        dataset = self._datasets.get(dataset_id)
+        if dataset is not None:
+            return dataset
+        with self._lock:
+            job = self._jobs.get(dataset_id)
+            if job is not None and job.error is not None and retry:
+                job = None
+            if job is None:
+                # Pudo terminar (y registrarse) entre la primera consulta y el lock
+                dataset = self._datasets.get(dataset_id)
+                if dataset is not None:
+                    return dataset
+                job = start()
+                job.on_done = lambda job: self._finish(dataset_id, name, job)
+                self._jobs[dataset_id] = job
+                job.start()
+        return job
+
+    def replace(self, dataset_id, name, dataset):
+        """Registra `dataset` con `dataset_id` en lugar del que tuviera, como una versión nueva."""
+        with self._lock:
+            self._info.pop(dataset_id, None)
+        self._register(dataset_id, name, dataset)
+        self._datasets.put(dataset_id, dataset)
+
+    def _finish(self, dataset_id, name, job):
+        if job.result is None:
+            return
+        self._register(dataset_id, name, job.result)
+        self._datasets.put(dataset_id, job.result)
+        with self._lock:
+            self._jobs.pop(dataset_id, None)
+
+    def _register(self, dataset_id, name, dataset):
+        loaded = set(self._datasets.keys())
+        with self._lock:
+            # Los datos de los datasets que ya salieron del registro no se guardan
+            self._info = {key: info for key, info in self._info.items() if key in loaded}
+            if dataset_id not in self._info:
+                self._versions[name] += 1
+                self._info[dataset_id] = {
+                    'id': dataset_id,
+                    'name': name,
+                    'version': self._versions[name],
+                    'rows': dataset.n_rows,
+                    'loaded_at': time.time(),
+                }
+
+    def entries(self):
+        """Datasets en memoria, del más reciente al más antiguo, con sus sesiones activas."""
+        loaded = set(self._datasets.keys())
+        with self._lock:
+            return sorted(
+                ({**info, 'sessions': self._refs[key]} for key, info in self._info.items() if key in loaded),
+                key=lambda info: info['loaded_at'],
+                reverse=True,
+            )
+
+    def lease(self, dataset_id):
+        """Marca el dataset como en uso hasta que el objeto devuelto se libere."""
+        return Lease(self, dataset_id)
+
+    def _acquire(self, dataset_id):
+        with self._lock:
+            self._refs[dataset_id] += 1
+
+    def _release(self, dataset_id):
+        with self._lock:
+            self._refs[dataset_id] -= 1
+            if self._refs[dataset_id] <= 0:
+                del self._refs[dataset_id]
+
+    def __contains__(self, dataset_id):
+        return dataset_id in self._datasets
+
+    def __len__(self):
+        return len(self._datasets)
+
+    @property
+    def nbytes(self):
+        return self._datasets.nbytes
+
+
+class Lease:
+    """Uso de un dataset por una sesión; se libera cuando el objeto se destruye.
+
+    Guardado en `st.session_state`, dura lo que la sesión o hasta que se
+    reemplaza por el de otro dataset.
+    """
+
+    def __init__(self, registry, dataset_id):
+        self.dataset_id = dataset_id
+        registry._acquire(dataset_id)
+        weakref.finalize(self, registry._release, dataset_id)
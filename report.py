@@ -0,0 +1,291 @@
+"""
+Reportes estáticos del dashboard, sin Streamlit: uno general, uno por ciudad,
+uno por agrupación y uno por cada cruce ciudad × agrupación.
+
+    python report.py sabana.csv --salida reportes/
+
+La sabana se procesa una sola vez; los reportes se reparten entre procesos
+que reciben solo el cubo de agregados.
+"""
+
+import argparse
+import base64
+import html
+import io
+import os
+import re
+import sys
+import time
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from pathlib import Path
+
+import plotly.graph_objects as go
+import plotly.io as pio
+from plotly.offline import get_plotlyjs, get_plotlyjs_version
+
+from cards import agrupacion_cards, insight_cards, project_cards
+from dataset import Dataset
+from figures import build_figure
+from formatting import format_cop, format_num, format_short
+from ingest import REQUIRED_COLUMNS, content_hash, iter_csv_chunks, load_sabana
+from theme import CORAL, LIME, TEAL
+
+# Proyectos en el detalle de cada reporte
+REPORT_TOP_PROJECTS = 25
+
+PAGE_CSS = """
+    * { font-family: 'Inter', -apple-system, 'Segoe UI', Roboto, sans-serif; box-sizing: border-box; }
+    body { background: #F8FAFC; margin: 0; padding: 1rem 2rem; color: #1E293B; }
+    .page { max-width: 1600px; margin: 0 auto; }
+    .kpis { display: grid; grid-template-columns: repeat(6, 1fr); gap: 1rem; margin: 1.5rem 0; }
+    .kpi { background: white; padding: 1.2rem; border-radius: 16px; border: 1px solid #E2E8F0;
+           box-shadow: 0 4px 20px rgba(18, 81, 96, 0.08); }
+    .kpi .label { color: #64748B; font-size: 0.75rem; font-weight: 600; text-transform: uppercase; }
+    .kpi .value { color: #125160; font-size: 1.7rem; font-weight: 800; }
+    .kpi .delta { color: #64748B; font-size: 0.8rem; }
+    .row { display: grid; grid-template-columns: 1fr 1fr; gap: 1.5rem; align-items: start; }
+    .section { font-weight: 700; margin: 1.5rem 0 0.5rem 0; }
+    .insights { display: grid; grid-template-columns: repeat(4, 1fr); gap: 1rem; }
+    img.figure { width: 100%; }
+"""
+
+
+def slugify(text):
+    ascii_text = unicodedata.normalize('NFKD', str(text)).encode('ascii', 'ignore').decode()
+    return re.sub(r'[^a-z0-9]+', '-', ascii_text.lower()).strip('-') or 'sin-nombre'
+
+
+def unique_slugs(values):
+    """Slug de cada valor; si dos coinciden (p. ej. 'Bogotá' y 'Bogota'), los siguientes llevan -2, -3..."""
+    slugs, used = {}, set()
+    for value in values:
+        base = slug = slugify(value)
+        n = 1
+        while slug in used:
+            n += 1
+            slug = f"{base}-{n}"
+        used.add(slug)
+        slugs[value] = slug
+    return slugs
+
+
+def load_dataset(path, sheets=None):
+    """Lee la sabana una vez y deja solo el cubo: es lo que viaja a cada proceso."""
+    content = Path(path).read_bytes()
+    digest = content_hash(content)
+    if path.lower().endswith('.csv'):
+        # Los reportes no filtran por fecha ni muestran la evolución diaria: basta el cubo mensual
+        return Dataset.from_chunks(digest, iter_csv_chunks(io.BytesIO(content)), days=False)
+    df = load_sabana(content, path, digest=digest, sheets=sheets)
+    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Faltan columnas: {missing}")
+    full = Dataset.from_frame(digest, df)
+    return Dataset(full.id, full.cube, full.n_rows, full.columns)
+
+
+def report_jobs(dataset, cruces=True):
+    """(nombre de archivo, título, filtros) de cada reporte."""
+    ciudades = unique_slugs(dataset.options('Ciudad'))
+    agrupaciones = unique_slugs(dataset.options('Agrupación'))
+    jobs = [('general', "Todas las ciudades y agrupaciones", {})]
+    jobs += [(f"ciudad-{slug}", c, {'Ciudad': [c]}) for c, slug in ciudades.items()]
+    jobs += [(f"agrupacion-{slug}", a, {'Agrupación': [a]}) for a, slug in agrupaciones.items()]
+    if cruces:
+        jobs += [
+            (f"ciudad-{ciudades[c]}--agrupacion-{agrupaciones[a]}", f"{c} · {a}", {'Ciudad': [c], 'Agrupación': [a]})
+            for c, a in product(ciudades, agrupaciones)
+        ]
+    return jobs
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# HTML
+# ══════════════════════════════════════════════════════════════════════════════
+
+def figure_html(fig, images):
+    if images:
+        png = base64.b64encode(fig.to_image(format='png', scale=2)).decode()
+        return f'<img class="figure" src="data:image/png;base64,{png}">'
+    return pio.to_html(fig, full_html=False, include_plotlyjs=False, config={'displayModeBar': False})
+
+
+def plotlyjs_tag(mode):
+    if mode == 'inline':
+        return f'<script type="text/javascript">{get_plotlyjs()}</script>'
+    if mode == 'cdn':
+        return f'<script src="https://cdn.plot.ly/plotly-{get_plotlyjs_version()}.min.js"></script>'
+    return '<script src="plotly.min.js"></script>'
+
+
+def kpi_html(label, value, delta):
+    return (
+        f'<div class="kpi"><div class="label">{label}</div>'
+        f'<div class="value">{value}</div><div class="delta">{delta}</div></div>'
+    )
+
+
+def report_html(stats, title, n_rows, images=False, plotlyjs='inline'):
+    def figure(fig_id):
+        return figure_html(build_figure(fig_id, stats), images)
+
+    kpis = [
+        kpi_html("💰 Venta total", format_short(stats.total_ventas), format_cop(stats.total_ventas)),
+        kpi_html("🏠 Unidades", format_num(stats.total_unidades), "Inmuebles"),
+        kpi_html("📈 Ticket", format_short(stats.ticket), "Promedio"),
+        kpi_html("🏗️ Proyectos", stats.nunique('MacroProyecto'), "Activos"),
+        kpi_html("📢 Agrupaciones", stats.nunique('Agrupación'), "Canales"),
+        kpi_html("🌎 Ciudades", stats.nunique('Ciudad'), "Operación"),
+    ]
+    monthly = figure('timeline:Mes') if stats.has('Mes') else "<p>Se requiere columna 'Fecha'</p>"
+    agrup_data = stats.by('Agrupación').sort_values('Valor Neto', ascending=False)
+    detalle = stats.projects().head(REPORT_TOP_PROJECTS)
+
+    return f"""<!DOCTYPE html>
+<html lang="es">
+<head>
+<meta charset="utf-8">
+<title>Conaltura | {html.escape(title)}</title>
+<style>{PAGE_CSS}</style>
+{'' if images else plotlyjs_tag(plotlyjs)}
+</head>
+<body><div class="page">
+<div style="display:flex; align-items:center; gap:1rem; margin-bottom:0.5rem;">
+    <h1 style="margin:0; font-size:2rem; font-weight:800; color:{TEAL};">Dashboard Ejecutivo</h1>
+    <span style="background:{CORAL}; color:white; padding:6px 14px; border-radius:20px; font-size:0.75rem; font-weight:700;">
+        🎯 Gran Convención 2025
+    </span>
+</div>
+<p style="margin:0; color:#64748B; font-size:0.9rem;">{html.escape(title)}</p>
+
+<div class="kpis">{''.join(kpis)}</div>
+
+<h2 style="color:{TEAL};">📊 Panorama</h2>
+<div class="row">
+    <div><div class="section">🏆 Ranking de Ciudades</div>{figure('city_ranking')}</div>
+    <div><div class="section">📈 Evolución Mensual</div>{monthly}</div>
+</div>
+
+<h2 style="color:{TEAL};">📢 Agrupaciones</h2>
+<div class="row">
+    <div>{figure('agrupacion_sales_share')}</div>
+    <div>{figure('agrupacion_units_share')}</div>
+</div>
+<div class="section">📋 Detalle por Agrupación</div>
+{agrupacion_cards(agrup_data)}
+<div class="section">💵 Ticket Promedio por Agrupación</div>
+{figure('agrupacion_ticket')}
+
+<h2 style="color:{TEAL};">🏗️ Proyectos</h2>
+<div class="row">
+    <div><div class="section">🏆 Top 15 Proyectos por Ventas</div>{figure('top_projects_sales')}</div>
+    <div><div class="section">📋 Detalle Top {len(detalle)}</div>{project_cards(detalle)}</div>
+</div>
+<div class="section">🏠 Top 15 por Unidades Vendidas</div>
+{figure('top_projects_units')}
+
+<div class="section">✨ Insights Ejecutivos</div>
+<div class="insights">{''.join(insight_cards(stats))}</div>
+
+<div style="text-align:center; padding:1rem 0; margin-top:2rem; border-top:1px solid #E2E8F0;">
+    <p style="color:{TEAL}; font-weight:600;">Dashboard Ejecutivo • Gran Convención CONALTURA 2025</p>
+    <p style="color:#64748B; font-size:0.8rem;">{format_num(stats.total_unidades)} de {format_num(n_rows)} registros</p>
+</div>
+</div></body>
+</html>
+"""
+
+
+def index_html(written):
+    links = '\n'.join(
+        f'<li><a href="{name}.html">{html.escape(title)}</a></li>' for name, title in written
+    )
+    return f"""<!DOCTYPE html>
+<html lang="es">
+<head><meta charset="utf-8"><title>Conaltura | Reportes</title><style>{PAGE_CSS}</style></head>
+<body><div class="page">
+<h1 style="color:{TEAL};">Reportes <span style="background:{TEAL}; color:{LIME}; padding:2px 8px; border-radius:4px;">{len(written)}</span></h1>
+<ul>{links}</ul>
+</div></body>
+</html>
+"""
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# PROCESOS
+# ══════════════════════════════════════════════════════════════════════════════
+
+_worker = {}
+
+
+def _init_worker(dataset, out_dir, images, plotlyjs):
+    _worker.update(dataset=dataset, out_dir=Path(out_dir), images=images, plotlyjs=plotlyjs)
+
+
+def render_report(job):
+    """Escribe un reporte; devuelve (nombre, título) o None si el filtro no tiene ventas."""
+    name, title, filters = job
+    dataset = _worker['dataset']
+    stats = dataset.stats(filters)
+    if stats.empty:
+        return None
+    page = report_html(stats, title, dataset.n_rows, _worker['images'], _worker['plotlyjs'])
+    (_worker['out_dir'] / f"{name}.html").write_text(page, encoding='utf-8')
+    return name, title
+
+
+def images_available():
+    try:
+        go.Figure().to_image(format='png')
+    except Exception:
+        return False
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera los reportes HTML del dashboard de Conaltura.")
+    parser.add_argument('archivo', help="Sabana de datos (.csv, .xlsx o .xls)")
+    parser.add_argument('--salida', default='reportes', help="Carpeta de salida (por defecto: reportes)")
+    parser.add_argument('--hojas', nargs='+', help="Hojas del Excel a unir (por defecto: la primera)")
+    parser.add_argument('--procesos', type=int, default=os.cpu_count() or 1, help="Procesos en paralelo")
+    parser.add_argument('--sin-cruces', action='store_true', help="Omite los reportes ciudad × agrupación")
+    parser.add_argument('--imagenes', action='store_true', help="Gráficas como PNG (requiere kaleido)")
+    parser.add_argument(
+        '--plotlyjs', choices=['inline', 'cdn', 'directory'], default='inline',
+        help="inline: cada reporte es autónomo; cdn/directory: reportes más livianos",
+    )
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        dataset = load_dataset(args.archivo, args.hojas)
+    except (OSError, ValueError) as e:
+        parser.exit(1, f"Error: {e}\n")
+
+    images = args.imagenes and images_available()
+    if args.imagenes and not images:
+        print("kaleido no está disponible: las gráficas quedan interactivas", file=sys.stderr)
+
+    out_dir = Path(args.salida)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    if args.plotlyjs == 'directory' and not images:
+        (out_dir / 'plotly.min.js').write_text(get_plotlyjs(), encoding='utf-8')
+
+    jobs = report_jobs(dataset, cruces=not args.sin_cruces)
+    init_args = (dataset, out_dir, images, args.plotlyjs)
+    if args.procesos > 1:
+        with ProcessPoolExecutor(args.procesos, initializer=_init_worker, initargs=init_args) as pool:
+            results = list(pool.map(render_report, jobs, chunksize=max(1, len(jobs) // (args.procesos * 4))))
+    else:
+        _init_worker(*init_args)
+        results = [render_report(job) for job in jobs]
+
+    written = [r for r in results if r is not None]
+    (out_dir / 'index.html').write_text(index_html(written), encoding='utf-8')
+    print(f"{len(written)} reportes en {time.perf_counter() - start:.1f}s → {out_dir}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,300 @@
+"""
+Motor SQL embebido para sabanas grandes: DuckDB si está instalado, SQLite si no.
+
+Las filas viven en una base temporal en disco y cada agregado del dashboard
+se resuelve con una consulta; a Python solo vuelven resultados pequeños.
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from aggregates import DATE_DIMENSION, TIME_GRANULARITIES, add_shares, filter_key, period_start
+
+TABLE = 'sabana'
+
+# Columnas que se guardan en la base; 'Fila' es la posición en la sabana
+SQL_TYPES = {
+    'Fila': 'BIGINT',
+    'Ciudad': 'VARCHAR',
+    'Agrupación': 'VARCHAR',
+    'MacroProyecto': 'VARCHAR',
+    'Medio Publicitario': 'VARCHAR',
+    'Día': 'TIMESTAMP',
+    'Valor Neto': 'DOUBLE',
+}
+
+
+def _q(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _where(clauses):
+    return f" WHERE {' AND '.join(clauses)}" if clauses else ''
+
+
+def _drop(con, directory):
+    con.close()
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+class SQLEngine:
+    """Una tabla `sabana` en una base temporal que se borra con el objeto.
+
+    Las escrituras se serializan; en DuckDB cada consulta usa su propio
+    cursor y las sesiones consultan en paralelo.
+    """
+
+    def __init__(self):
+        self.directory = tempfile.mkdtemp(prefix='conaltura-sql-')
+        path = os.path.join(self.directory, 'sabana.db')
+        try:
+            import duckdb
+        except ImportError:
+            duckdb = None
+        if duckdb is not None:
+            self.driver = 'duckdb'
+            self._con = duckdb.connect(path)
+        else:
+            self.driver = 'sqlite'
+            self._con = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self.columns = []
+        self.n_rows = 0
+        weakref.finalize(self, _drop, self._con, self.directory)
+
+    def _create(self, columns):
+        defs = []
+        for col in columns:
+            if col == 'Fila' and self.driver == 'sqlite':
+                # Alias del rowid: buscar por 'Fila' no recorre la tabla
+                defs.append(f"{_q(col)} INTEGER PRIMARY KEY")
+            else:
+                defs.append(f"{_q(col)} {SQL_TYPES[col]}")
+        self._con.execute(f"CREATE TABLE {TABLE} ({', '.join(defs)})")
+        self.columns = columns
+
+    def append(self, chunk):
+        """Agrega un bloque ya limpio; las columnas se fijan con el primer bloque."""
+        with self._lock:
+            if not self.columns:
+                self._create([c for c in SQL_TYPES if c == 'Fila' or c in chunk.columns])
+            data = chunk.reindex(columns=self.columns[1:])
+            data.insert(0, 'Fila', np.arange(self.n_rows, self.n_rows + len(chunk)))
+            if DATE_DIMENSION in data.columns and self.driver == 'sqlite':
+                # SQLite no tiene fechas: texto ISO, que ordena y compara como la fecha
+                data[DATE_DIMENSION] = data[DATE_DIMENSION].dt.strftime('%Y-%m-%d')
+            if self.driver == 'duckdb':
+                self._con.register('_bloque', data)
+                try:
+                    self._con.execute(f"INSERT INTO {TABLE} SELECT * FROM _bloque")
+                finally:
+                    self._con.unregister('_bloque')
+            else:
+                data.to_sql(TABLE, self._con, if_exists='append', index=False)
+            self.n_rows += len(chunk)
+
+    def date_param(self, value):
+        """Una fecha como parámetro de consulta, en el formato en que se guardó 'Día'."""
+        value = pd.Timestamp(value)
+        return value.to_pydatetime() if self.driver == 'duckdb' else value.strftime('%Y-%m-%d')
+
+    def query(self, sql, params=()):
+        if self.driver == 'duckdb':
+            cursor = self._con.cursor()
+            try:
+                return cursor.execute(sql, list(params)).df()
+            finally:
+                cursor.close()
+        with self._lock:
+            return pd.read_sql_query(sql, self._con, params=list(params))
+
+    @property
+    def nbytes(self):
+        return sum(
+            os.path.getsize(os.path.join(self.directory, name)) for name in os.listdir(self.directory)
+        )
+
+
+def filter_clauses(engine, filters):
+    """Condiciones SQL (con sus parámetros) de un estado de filtros."""
+    clauses, params = [], []
+    for dim, values in filters.items():
+        if not values or dim not in engine.columns:
+            continue
+        if dim == DATE_DIMENSION:
+            clauses.append(f"{_q(dim)} BETWEEN ? AND ?")
+            params.extend(engine.date_param(v) for v in values)
+        else:
+            clauses.append(f"{_q(dim)} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+    return clauses, params
+
+
+class SQLStats:
+    """Los agregados de DashboardStats, calculados en el motor SQL.
+
+    Devuelve las mismas columnas y el mismo orden que DashboardStats.
+    """
+
+    def __init__(self, engine, filters, key=None):
+        self.engine = engine
+        self.key = key
+        self._clauses, self._params = filter_clauses(engine, filters)
+        totals = engine.query(
+            f"SELECT SUM(\"Valor Neto\") AS ventas, COUNT(*) AS unidades FROM {TABLE}{self._where()}",
+            self._params,
+        )
+        self.total_ventas = float(totals['ventas'].fillna(0).iloc[0])
+        self.total_unidades = int(totals['unidades'].iloc[0])
+        self.ticket = self.total_ventas / self.total_unidades if self.total_unidades > 0 else 0
+        self._by = {}
+
+    def _where(self, *extra):
+        return _where(self._clauses + list(extra))
+
+    @property
+    def empty(self):
+        return self.total_unidades == 0
+
+    def has(self, dim):
+        if dim in TIME_GRANULARITIES:
+            return DATE_DIMENSION in self.engine.columns
+        return dim in self.engine.columns
+
+    def by(self, dim):
+        if dim not in self._by:
+            if dim in TIME_GRANULARITIES[1:]:
+                # Semanas, meses y trimestres se acumulan desde el agregado diario, que es pequeño
+                daily = self.by(DATE_DIMENSION)
+                data = daily.groupby(period_start(daily[DATE_DIMENSION], dim).rename(dim))
+                self._by[dim] = add_shares(data[['Valor Neto', 'Unidades']].sum()).reset_index()
+                return self._by[dim]
+            q = _q(dim)
+            data = self.engine.query(
+                f"SELECT {q}, SUM(\"Valor Neto\") AS \"Valor Neto\", COUNT(*) AS \"Unidades\" "
+                f"FROM {TABLE}{self._where(f'{q} IS NOT NULL')} GROUP BY {q} ORDER BY {q}",
+                self._params,
+            )
+            if dim == DATE_DIMENSION:
+                data[dim] = pd.to_datetime(data[dim])
+            self._by[dim] = add_shares(data)
+        return self._by[dim]
+
+    def timeline(self, granularity):
+        """Ventas y unidades por periodo, en orden cronológico y con el año (sin filas sin fecha)."""
+        return self.by(granularity)
+
+    def nunique(self, dim):
+        return len(self.by(dim))
+
+    def projects(self):
+        """Agregado por MacroProyecto con la ciudad de su primera fila en la sabana."""
+        if 'projects' not in self._by:
+            first_city = self.engine.query(
+                f"SELECT s.\"MacroProyecto\", s.\"Ciudad\" FROM {TABLE} s JOIN ("
+                f"SELECT MIN(\"Fila\") AS \"Fila\" FROM {TABLE}{self._where()} GROUP BY \"MacroProyecto\""
+                f") p ON s.\"Fila\" = p.\"Fila\"",
+                self._params,
+            ).set_index('MacroProyecto')['Ciudad']
+            data = self.by('MacroProyecto').join(first_city, on='MacroProyecto')
+            self._by['projects'] = data.sort_values('Valor Neto', ascending=False)
+        return self._by['projects']
+
+
+class SQLDataset:
+    """Misma interfaz que Dataset, con las filas en un SQLEngine.
+
+    No hay `frame` ni cubo en memoria: filtros y agregados se resuelven en SQL.
+    """
+
+    frame = None
+    # Las filas están en la base: se pueden exportar
+    has_rows = True
+
+    def __init__(self, dataset_id, engine, n_rows, columns):
+        self.id = dataset_id
+        self.engine = engine
+        self.n_rows = n_rows
+        self.columns = columns
+        self._options = {}
+        self._date_range = None
+
+    @classmethod
+    def from_chunks(cls, dataset_id, chunks):
+        engine = SQLEngine()
+        columns = None
+        for chunk in chunks:
+            engine.append(chunk)
+            columns = columns or list(chunk.columns)
+        if engine.n_rows == 0:
+            raise ValueError("La sabana no tiene filas")
+        return cls(dataset_id, engine, engine.n_rows, columns)
+
+    @property
+    def nbytes(self):
+        # Las filas están en disco; en memoria solo quedan resultados de consultas
+        return 0
+
+    def options(self, dim):
+        if dim not in self._options:
+            values = self.engine.query(f"SELECT DISTINCT {_q(dim)} AS v FROM {TABLE} ORDER BY 1")['v']
+            self._options[dim] = values.dropna().tolist()
+        return self._options[dim]
+
+    def date_range(self):
+        """Primera y última fecha de la sabana; None si no trae 'Fecha'."""
+        if DATE_DIMENSION not in self.engine.columns:
+            return None
+        if self._date_range is None:
+            q = _q(DATE_DIMENSION)
+            bounds = self.engine.query(f"SELECT MIN({q}) AS desde, MAX({q}) AS hasta FROM {TABLE}").iloc[0]
+            first, last = pd.to_datetime(bounds['desde']), pd.to_datetime(bounds['hasta'])
+            self._date_range = () if pd.isna(first) else (first, last)
+        return self._date_range or None
+
+    def schema(self):
+        columns = [c for c in self.engine.columns if c != 'Fila']
+        return pd.DataFrame({
+            'Columna': columns,
+            'Tipo': [SQL_TYPES[c] for c in columns],
+            'Memoria (MB)': np.nan,
+        })
+
+    def iter_rows(self, filters, chunk_rows):
+        """Filas que cumplen `filters`, en bloques de hasta `chunk_rows`, en el orden de la sabana.
+
+        Cada bloque continúa desde la última 'Fila' leída: no se usa OFFSET,
+        que obligaría a recorrer otra vez lo ya exportado. Sin filas que
+        cumplan, produce un bloque vacío con las columnas.
+        """
+        clauses, params = filter_clauses(self.engine, filters)
+        clauses = clauses + ['"Fila" > ?']
+        columns = ', '.join(_q(c) for c in self.engine.columns)
+        last = -1
+        while True:
+            chunk = self.engine.query(
+                f"SELECT {columns} FROM {TABLE}{_where(clauses)} "
+                f"ORDER BY \"Fila\" LIMIT {int(chunk_rows)}",
+                params + [last],
+            )
+            if chunk.empty and last >= 0:
+                return
+            if DATE_DIMENSION in chunk.columns:
+                chunk[DATE_DIMENSION] = pd.to_datetime(chunk[DATE_DIMENSION])
+            yield chunk.drop(columns='Fila')
+            if chunk.empty:
+                return
+            last = int(chunk['Fila'].iloc[-1])
+
+    def stats_key(self, filters):
+        return (self.id, filter_key(filters))
+
+    def stats(self, filters):
+        return SQLStats(self.engine, filters, key=self.stats_key(filters))
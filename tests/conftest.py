@@ -0,0 +1,23 @@
+"""
+Datos compartidos por las pruebas: una sabana sintética pequeña, en CSV y ya limpia.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench.sabana import generate_sabana  # noqa: E402
+from ingest import load_sabana  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def sabana_csv():
+    return generate_sabana(6000, seed=7).to_csv(sep=';', index=False).encode('utf-8')
+
+
+@pytest.fixture(scope='session')
+def sabana(sabana_csv):
+    return load_sabana(sabana_csv, 'sabana.csv')
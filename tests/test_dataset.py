@@ -0,0 +1,20 @@
+import gc
+
+import pytest
+
+from cache import LRUCache
+from dataset import Dataset
+
+
+def test_cached_stats_do_not_outlive_their_dataset(sabana):
+    cache = LRUCache(16)
+    first = Dataset.from_frame('sabana', sabana)
+    cache.get_or_compute(first.stats_key({}), lambda: first.stats({}))
+    del first
+    gc.collect()
+
+    # El mismo archivo, cargado otra vez después de salir del registro
+    again = Dataset.from_frame('sabana', sabana)
+    stats = cache.get_or_compute(again.stats_key({}), lambda: again.stats({}))
+    for granularity in ['Día', 'Semana']:
+        assert stats.timeline(granularity)['Valor Neto'].sum() == pytest.approx(sabana['Valor Neto'].sum())
@@ -0,0 +1,89 @@
+import pandas as pd
+import pytest
+
+from bench.sabana import generate_sabana
+from dropfolder import DropFolder
+
+
+@pytest.fixture
+def raw():
+    df = generate_sabana(1200, seed=3)
+    df.insert(0, 'ID Venta', range(1, len(df) + 1))
+    return df
+
+
+def write_csv(path, df):
+    path.write_bytes(df.to_csv(sep=';', index=False).encode('utf-8'))
+
+
+def total_ventas(folder):
+    return folder.dataset.stats({}).total_ventas
+
+
+def test_same_rows_in_another_file_are_not_added(tmp_path, raw):
+    folder = DropFolder(tmp_path, settle=0)
+    write_csv(tmp_path / 'lunes.csv', raw.iloc[:800])
+    assert folder.scan() == 800
+    assert folder.scan() == 0
+
+    # La exportación del martes repite lo del lunes y trae 400 ventas nuevas
+    write_csv(tmp_path / 'martes.csv', raw)
+    assert folder.scan() == 400
+    assert folder.dataset.n_rows == len(raw)
+    assert total_ventas(folder) == pytest.approx(raw['Valor Neto'].sum())
+
+
+def test_identical_rows_count_as_distinct_sales(tmp_path, raw):
+    folder = DropFolder(tmp_path, settle=0)
+    sales = raw.drop(columns='ID Venta').iloc[:300]
+    write_csv(tmp_path / 'a.csv', sales)
+    folder.scan()
+
+    # Una fila que aparece dos veces donde antes había una es otra venta
+    twice = pd.concat([sales, sales.iloc[:1]], ignore_index=True)
+    write_csv(tmp_path / 'b.csv', twice)
+    assert folder.scan() == 1
+    assert folder.dataset.n_rows == 301
+
+
+def test_key_column_deduplicates(tmp_path, raw):
+    folder = DropFolder(tmp_path, key='ID Venta', settle=0)
+    write_csv(tmp_path / 'a.csv', raw.iloc[:500])
+    folder.scan()
+
+    # Con llave, una venta repetida no entra aunque cambie otra columna
+    changed = raw.iloc[400:700].copy()
+    changed['Valor Neto'] += 1000
+    write_csv(tmp_path / 'b.csv', changed)
+    assert folder.scan() == 200
+    assert total_ventas(folder) == pytest.approx(raw['Valor Neto'].iloc[:500].sum() + changed['Valor Neto'].iloc[100:].sum())
+
+
+def test_appended_csv_reads_only_its_tail(tmp_path, raw):
+    folder = DropFolder(tmp_path, settle=0)
+    path = tmp_path / 'crm.csv'
+    write_csv(path, raw.iloc[:700])
+    folder.scan()
+
+    # El mismo archivo con filas agregadas al final: entran todas, aunque repitan una anterior
+    tail = pd.concat([raw.iloc[700:], raw.iloc[:1]], ignore_index=True)
+    with path.open('ab') as f:
+        f.write(tail.to_csv(sep=';', index=False, header=False).encode('utf-8'))
+    assert folder.scan() == len(tail)
+    assert folder.dataset.n_rows == len(raw) + 1
+    assert total_ventas(folder) == pytest.approx(raw['Valor Neto'].sum() + raw['Valor Neto'].iloc[0])
+
+
+def test_sabana_without_dates_keeps_ingesting(tmp_path, raw):
+    folder = DropFolder(tmp_path, settle=0)
+    sales = raw.drop(columns='Fecha')
+    write_csv(tmp_path / 'a.csv', sales.iloc[:600])
+    folder.scan()
+    # El dashboard pide el rango de fechas en cada rerun, entre una revisión y otra
+    assert folder.dataset.date_range() is None
+
+    write_csv(tmp_path / 'b.csv', sales)
+    assert folder.scan() == 600
+    assert folder.errors == {}
+    assert folder.dataset.date_range() is None
+    assert total_ventas(folder) == pytest.approx(sales['Valor Neto'].sum())
@@ -0,0 +1,50 @@
+import codecs
+import io
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+from openpyxl import load_workbook
+
+from dataset import Dataset
+from export import export_file, frame_chunks
+from sqlengine import SQLDataset
+
+NO_MATCH = {'Ciudad': ['No existe']}
+
+
+@pytest.fixture(scope='module')
+def datasets(sabana):
+    return [Dataset.from_frame('memoria', sabana), SQLDataset.from_chunks('sql', [sabana])]
+
+
+def read_back(path, fmt):
+    if fmt == 'csv':
+        with open(path, 'rb') as f:
+            content = f.read()
+        assert content.startswith(codecs.BOM_UTF8)
+        return pd.read_csv(io.BytesIO(content[len(codecs.BOM_UTF8):]), sep=';')
+    if fmt == 'parquet':
+        return pq.read_table(path).to_pandas()
+    rows = list(load_workbook(path, read_only=True).active.values)
+    return pd.DataFrame(rows[1:], columns=rows[0])
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'parquet', 'xlsx'])
+@pytest.mark.parametrize('source', ['memoria', 'sql'])
+def test_empty_rows_export_keeps_header(datasets, tmp_path, fmt, source):
+    dataset = datasets[['memoria', 'sql'].index(source)]
+    chunks = list(dataset.iter_rows(NO_MATCH, 1000))
+    assert [len(chunk) for chunk in chunks] == [0]
+
+    data = read_back(export_file(iter(chunks), fmt, directory=tmp_path), fmt)
+    assert data.empty
+    assert list(data.columns) == list(chunks[0].columns)
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'parquet', 'xlsx'])
+def test_empty_table_export_keeps_header(tmp_path, fmt):
+    table = pd.DataFrame({'Ciudad': pd.Series([], dtype=str), 'Valor Neto': pd.Series([], dtype=float)})
+    data = read_back(export_file(frame_chunks(table), fmt, directory=tmp_path), fmt)
+    assert data.empty
+    assert list(data.columns) == ['Ciudad', 'Valor Neto']
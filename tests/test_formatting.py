@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from formatting import (
+    VECTOR_MIN_VALUES, format_cop, format_cop_array, format_num, format_num_array, format_short, format_short_array,
+)
+
+VALUES = [
+    0, 0.4, -0.4, 0.5, 1.5, 2.5, -2.5, 7, -7, 999, 999.5, -999.5, 1_000, 1_499, 1_500, 2_500, 9_999.5,
+    123_456.789, -123_456.789, 999_499, 999_500, 999_999.5, 1_000_000, 1_499_999, 1_500_000, -2_500_000,
+    12_345_678, 987_654_321.5, 1_049_999_999, 1_050_000_000, -1_250_000_000, 999_999_999_999,
+    1_005_000_000_000, 4.2e12, -3.75e13, float('nan'),
+]
+
+
+def random_values(n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    magnitude = 10 ** rng.uniform(0, 14, n)
+    values = magnitude * rng.choice([-1, 1], n)
+    # Mitad con centavos, mitad enteros o en media unidad (empates de redondeo)
+    values[: n // 4] = np.round(values[: n // 4])
+    values[n // 4: n // 2] = np.round(values[n // 4: n // 2]) + 0.5
+    return values
+
+
+@pytest.mark.parametrize('scalar, vector', [
+    (format_cop, format_cop_array),
+    (format_short, format_short_array),
+    (format_num, format_num_array),
+])
+# Pocos valores van por la función escalar; se repiten los bordes para probar también los kernels de Arrow
+@pytest.mark.parametrize('values', [
+    VALUES, VALUES * (VECTOR_MIN_VALUES // len(VALUES) + 1), random_values(),
+], ids=['bordes', 'bordes-vectorial', 'aleatorios'])
+def test_vector_matches_scalar(scalar, vector, values):
+    expected = [scalar(v) for v in values]
+    assert list(vector(np.array(values, dtype='float64'))) == expected
+
+
+def test_series_keeps_index_and_name():
+    values = pd.Series([1_500_000.0, float('nan'), -2_000.0], index=['a', 'b', 'c'], name='Valor Neto')
+    labels = format_cop_array(values)
+    assert labels.index.tolist() == ['a', 'b', 'c']
+    assert labels.name == 'Valor Neto'
+    assert labels.tolist() == ['$1.500.000', '$0', '$-2.000']
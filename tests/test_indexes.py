@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregates import FILTER_DIMENSIONS, RowIndex, TimeIndex
+
+
+def brute_force(df, filters):
+    """Posiciones que cumplen `filters` comparando columnas completas."""
+    mask = np.ones(len(df), dtype=bool)
+    for dim, values in filters.items():
+        if dim == 'Día':
+            desde, hasta = (pd.Timestamp(v) for v in values)
+            mask &= (df['Día'] >= desde).to_numpy() & (df['Día'] < hasta + pd.Timedelta(days=1)).to_numpy()
+        elif values:
+            mask &= df[dim].isin(values).to_numpy()
+    return np.flatnonzero(mask)
+
+
+def filter_cases(df, n=40, seed=0):
+    rng = np.random.default_rng(seed)
+    desde, hasta = df['Día'].min(), df['Día'].max()
+    cases = [{}, {'Ciudad': []}, {'Ciudad': ['No existe']}]
+    for _ in range(n):
+        filters = {}
+        for dim in rng.choice(FILTER_DIMENSIONS, rng.integers(1, 4), replace=False):
+            options = df[dim].dropna().unique().tolist()
+            filters[dim] = rng.choice(options, rng.integers(1, min(len(options), 4) + 1), replace=False).tolist()
+        if rng.random() < 0.6:
+            start = desde + pd.Timedelta(days=int(rng.integers(0, 300)))
+            filters['Día'] = (start, start + pd.Timedelta(days=int(rng.integers(0, 120))))
+        cases.append(filters)
+    return cases
+
+
+def split(df, sizes):
+    bounds = np.cumsum([0, *sizes])
+    return [(df.iloc[lo:hi].reset_index(drop=True), lo) for lo, hi in zip(bounds[:-1], bounds[1:])]
+
+
+def build_indexes(parts):
+    (first, _), rest = parts[0], parts[1:]
+    rows, days = RowIndex(first, FILTER_DIMENSIONS), TimeIndex(first['Día'])
+    for part, offset in rest:
+        rows, days = rows.extended(part, offset), days.extended(part['Día'], offset)
+    return rows, days
+
+
+def select(rows, days, filters):
+    positions = rows.select({k: v for k, v in filters.items() if k != 'Día'})
+    if 'Día' in filters:
+        positions = days.select(*filters['Día'], positions=positions)
+    return np.arange(rows.n_rows) if positions is None else positions
+
+
+@pytest.mark.parametrize('sizes', [[6000], [2500, 1, 3499], [1000] * 6], ids=['un bloque', 'tres', 'seis'])
+def test_indexes_match_brute_force(sabana, sizes):
+    rows, days = build_indexes(split(sabana, sizes))
+    for filters in filter_cases(sabana):
+        positions = select(rows, days, filters)
+        np.testing.assert_array_equal(positions, brute_force(sabana, filters), err_msg=str(filters))
+        assert (np.diff(positions) > 0).all()
+
+
+def test_extended_index_leaves_original_unchanged(sabana):
+    (first, _), (second, offset) = split(sabana, [4000, 2000])
+    rows = RowIndex(first, FILTER_DIMENSIONS)
+    days = TimeIndex(first['Día'])
+    rows.extended(second, offset)
+    days.extended(second['Día'], offset)
+    ciudad = {'Ciudad': [first['Ciudad'].iloc[0]]}
+    np.testing.assert_array_equal(rows.select(ciudad), brute_force(first, ciudad))
+    assert days.bounds == (first['Día'].min(), first['Día'].max())
+
+
+def test_time_index_skips_missing_dates():
+    days = pd.Series(pd.to_datetime(['2025-03-02', None, '2025-01-15', '2025-03-02', None]))
+    index = TimeIndex(days).extended(pd.Series(pd.to_datetime([None, '2025-02-01'])), 5)
+    assert index.bounds == (pd.Timestamp('2025-01-15'), pd.Timestamp('2025-03-02'))
+    np.testing.assert_array_equal(index.select('2025-01-01', '2025-12-31'), [0, 2, 3, 6])
+    np.testing.assert_array_equal(index.select('2025-02-01', '2025-02-01'), [6])
+    np.testing.assert_array_equal(index.select('2024-01-01', '2024-12-31'), [])
@@ -0,0 +1,30 @@
+import pandas as pd
+import pytest
+
+from aggregates import TIME_GRANULARITIES
+from figures import build_figure
+from ingest import sample_csv
+from preview import SampleDataset
+
+
+@pytest.fixture(scope='module')
+def preview(sabana_csv):
+    return SampleDataset('muestra', *sample_csv(sabana_csv, 1500))
+
+
+@pytest.mark.parametrize('granularity', TIME_GRANULARITIES)
+@pytest.mark.parametrize('with_filters', [False, True])
+def test_timeline_renders_at_every_granularity(preview, granularity, with_filters):
+    filters = {}
+    if with_filters:
+        desde, hasta = preview.date_range()
+        filters = {'Ciudad': preview.options('Ciudad')[:2], 'Día': (desde + pd.Timedelta(days=45), hasta)}
+    stats = preview.stats(filters)
+
+    assert stats.has(granularity)
+    fig = build_figure(f'timeline:{granularity}', stats)
+
+    data = stats.timeline(granularity)
+    assert data['Margen Ventas'].notna().all()
+    assert data['Valor Neto'].sum() == pytest.approx(stats.total_ventas)
+    assert len(fig.data) == 2
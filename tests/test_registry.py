@@ -0,0 +1,17 @@
+from dataset import Dataset
+from registry import DatasetRegistry
+
+
+def test_replace_keeps_only_the_latest_version(sabana):
+    registry = DatasetRegistry(max_entries=8)
+    dataset = Dataset.from_frame('v1', sabana.iloc[:1000].reset_index(drop=True))
+    registry.replace('carpeta', 'carpeta', dataset)
+    for start in range(1000, 6000, 1000):
+        dataset = dataset.append(f"v{start}", sabana.iloc[start:start + 1000].reset_index(drop=True))
+        registry.replace('carpeta', 'carpeta', dataset)
+
+    assert len(registry) == 1
+    assert registry.get('carpeta') is dataset
+    assert registry.nbytes == dataset.nbytes
+    [entry] = registry.entries()
+    assert (entry['version'], entry['rows']) == (6, len(sabana))
@@ -0,0 +1,22 @@
+from report import report_jobs, unique_slugs
+
+
+class Options:
+    def __init__(self, **options):
+        self._options = options
+
+    def options(self, dim):
+        return self._options[dim]
+
+
+def test_unique_slugs_disambiguates_collisions():
+    slugs = unique_slugs(['Bogota', 'Bogotá', 'BOGOTÁ', 'Medellín'])
+    assert slugs == {'Bogota': 'bogota', 'Bogotá': 'bogota-2', 'BOGOTÁ': 'bogota-3', 'Medellín': 'medellin'}
+
+
+def test_report_files_are_unique():
+    dataset = Options(Ciudad=['Bogota', 'Bogotá', 'Cali'], **{'Agrupación': ['Digital', 'Dígital', '¡!']})
+    jobs = report_jobs(dataset)
+    names = [name for name, _, _ in jobs]
+    assert len(names) == len(set(names)) == 1 + 3 + 3 + 9
+    assert ('ciudad-bogota-2--agrupacion-digital-2', "Bogotá · Dígital") in [(n, t) for n, t, _ in jobs]
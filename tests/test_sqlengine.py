@@ -0,0 +1,75 @@
+import pandas as pd
+import pytest
+
+from aggregates import TIME_GRANULARITIES
+from dataset import Dataset
+from sqlengine import SQLDataset
+
+
+@pytest.fixture(scope='module')
+def datasets(sabana):
+    chunks = [sabana.iloc[i:i + 2000].reset_index(drop=True) for i in range(0, len(sabana), 2000)]
+    return Dataset.from_frame('memoria', sabana), SQLDataset.from_chunks('sql', chunks)
+
+
+def filter_cases(dataset):
+    desde, hasta = dataset.date_range()
+    ciudades = dataset.options('Ciudad')
+    return [
+        {},
+        {'Ciudad': ciudades[:2]},
+        {'Agrupación': dataset.options('Agrupación')[:3], 'Medio Publicitario': dataset.options('Medio Publicitario')[:4]},
+        {'Día': (desde + pd.Timedelta(days=40), hasta - pd.Timedelta(days=70))},
+        {'Ciudad': ciudades[1:3], 'Día': (desde + pd.Timedelta(days=3), desde + pd.Timedelta(days=17))},
+        {'Ciudad': ['No existe']},
+    ]
+
+
+def assert_same(expected, got, key):
+    expected = expected.sort_values(key).reset_index(drop=True)
+    got = got.sort_values(key).reset_index(drop=True)
+    pd.testing.assert_frame_equal(
+        got.astype({key: str}), expected.astype({key: str}), check_dtype=False, check_categorical=False,
+    )
+
+
+def test_options_and_date_range(datasets):
+    memory, sql = datasets
+    assert sql.n_rows == memory.n_rows
+    assert sql.date_range() == memory.date_range()
+    for dim in ['Ciudad', 'Agrupación', 'MacroProyecto', 'Medio Publicitario']:
+        assert sql.options(dim) == memory.options(dim)
+
+
+@pytest.mark.parametrize('case', range(6))
+def test_stats_match_in_memory(datasets, case):
+    memory, sql = datasets
+    filters = filter_cases(memory)[case]
+    expected, got = memory.stats(filters), sql.stats(filters)
+
+    assert got.empty == expected.empty
+    assert got.total_unidades == expected.total_unidades
+    assert got.total_ventas == pytest.approx(expected.total_ventas)
+    if expected.empty:
+        return
+    for dim in ['Ciudad', 'Agrupación', 'MacroProyecto', 'Medio Publicitario']:
+        assert_same(expected.by(dim), got.by(dim), dim)
+    for granularity in TIME_GRANULARITIES:
+        assert_same(expected.timeline(granularity), got.timeline(granularity), granularity)
+    assert_same(expected.projects(), got.projects(), 'MacroProyecto')
+
+
+@pytest.mark.parametrize('case', range(6))
+def test_iter_rows_match_in_memory(datasets, case):
+    memory, sql = datasets
+    filters = filter_cases(memory)[case]
+    expected = list(memory.iter_rows(filters, 1000))
+    got = list(sql.iter_rows(filters, 1000))
+    assert [len(chunk) for chunk in got] == [len(chunk) for chunk in expected]
+    if expected:
+        # La base guarda solo las columnas que usa el dashboard, con 'Día' en vez de 'Fecha'
+        expected = pd.concat(expected, ignore_index=True)
+        expected['Día'] = expected['Fecha'].dt.normalize()
+        got = pd.concat(got, ignore_index=True)
+        columns = list(got.columns)
+        pd.testing.assert_frame_equal(got.astype(str), expected[columns].astype(str))
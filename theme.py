@@ -0,0 +1,36 @@
+"""
+Colores de la marca, sin dependencias: la pantalla de bienvenida los usa
+antes de que se importe Plotly.
+"""
+
+TEAL = '#125160'
+LIME = '#DBFF69'
+CORAL = '#FF795A'
+LILAC = '#B382FF'
+CYAN = '#00D4AA'
+GOLD = '#FFB800'
+
+AGRUPACION_COLORS = {
+    'Ventas Digitales': '#00D4AA',
+    'Ventas Tradicionales': '#125160',
+    'Ventas Referidos': '#B382FF',
+    'Ventas Ferias': '#FF795A',
+    'Ventas Recompra': '#FFB800',
+    'Ventas Colaboradores': '#4A90D9',
+    'Ventas Aliados': '#FF6B9D',
+    'Ventas Canjes': '#DBFF69',
+    'Ventas Empresas': '#8B5CF6',
+    'Eventos Internacionales': '#EC4899',
+}
+
+CIUDAD_COLORS = {
+    'Medellín': '#125160',
+    'Barranquilla': '#FF795A',
+    'Bogotá': '#B382FF',
+    'Cali': '#00D4AA',
+    'Cartagena': '#FFB800',
+}
+
+
+def get_color(name, color_dict):
+    return color_dict.get(name, '#64748B')